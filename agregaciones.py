@@ -0,0 +1,221 @@
+from math import prod
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from cubo import (
+    COL_ANIO, COL_AREA, COL_DEPARTAMENTO, COL_DESTINO, COL_GENERO, COL_MODALIDAD, COL_REGION, COL_TOTAL,
+)
+
+# Las agrupaciones pedidas se reúnen en tensores densos de conteos de a lo sumo
+# este número de celdas; cada tensor se llena en una sola pasada sobre los datos
+# y cada indicador se obtiene marginalizándolo (normalmente 1 o 2 pasadas).
+LIMITE_CELDAS = 2_000_000
+
+
+class Indicador(NamedTuple):
+    """Definición de un indicador: tipo de resultado y dimensiones que agrupa."""
+    tipo: str            # 'conteo', 'proporcion', 'tabla', 'moda', 'top_k' o 'distintos'
+    dimensiones: tuple
+    k: int = 5
+
+
+# Catálogo de indicadores del dashboard
+INDICADORES = {
+    'genero_global': Indicador('conteo', (COL_GENERO,)),
+    'genero_por_ano': Indicador('tabla', (COL_ANIO, COL_GENERO)),
+    'genero_por_region': Indicador('tabla', (COL_DEPARTAMENTO, COL_GENERO)),
+    'genero_por_destino': Indicador('tabla', (COL_DESTINO, COL_GENERO)),
+    'sexo_modalidad': Indicador('tabla', (COL_MODALIDAD, COL_GENERO)),
+    'sexo_ocde': Indicador('tabla', (COL_AREA, COL_GENERO)),
+    'conteo_destino': Indicador('conteo', (COL_DESTINO,)),
+    'participacion_por_pais': Indicador('proporcion', (COL_DESTINO,)),
+    'conteo_ocde': Indicador('conteo', (COL_AREA,)),
+    'movilidad_por_region': Indicador('conteo', (COL_REGION,)),
+    'pais_por_region': Indicador('moda', (COL_REGION, COL_DESTINO)),
+    'diversidad_destinos_ano': Indicador('distintos', (COL_ANIO, COL_DESTINO)),
+    'ranking_destino_ano': Indicador('top_k', (COL_ANIO, COL_DESTINO), k=5),
+}
+
+
+def _codificar(serie):
+    """Códigos enteros (los nulos reciben el código n) y categorías ordenadas de una columna."""
+    codigos, categorias = pd.factorize(serie, sort=True)
+    if isinstance(categorias.dtype, pd.CategoricalDtype):
+        categorias = categorias.astype(categorias.dtype.categories.dtype)
+    n = len(categorias)
+    return np.where(codigos < 0, n, codigos), pd.Index(categorias, name=serie.name)
+
+
+def _conteos_densos(codigos, dimensiones, pesos):
+    """Tensor denso de conteos (incluye una posición extra para nulos por dimensión)."""
+    forma = tuple(len(codigos[dim][1]) + 1 for dim in dimensiones)
+    clave = np.ravel_multi_index([codigos[dim][0] for dim in dimensiones], forma)
+    conteos = np.bincount(clave, weights=pesos, minlength=prod(forma))
+    return conteos.reshape(forma).astype(np.int64)
+
+
+def _agrupar_en_tensores(agrupaciones, cardinalidad):
+    """Reparte las agrupaciones en conjuntos de dimensiones cuyo tensor no supere LIMITE_CELDAS."""
+    tensores = []
+    for agr in sorted(agrupaciones, key=lambda a: -prod(cardinalidad[dim] for dim in a)):
+        for dims in tensores:
+            union = dims | set(agr)
+            if prod(cardinalidad[dim] for dim in union) <= LIMITE_CELDAS:
+                dims |= union
+                break
+        else:
+            tensores.append(set(agr))
+    return tensores
+
+
+def _marginal(tensor, dimensiones_tensor, dimensiones):
+    """Suma el tensor sobre las dimensiones no pedidas y descarta las posiciones de nulos."""
+    ejes = tuple(i for i, dim in enumerate(dimensiones_tensor) if dim not in dimensiones)
+    resultado = tensor.sum(axis=ejes)
+    restantes = [dim for dim in dimensiones_tensor if dim in dimensiones]
+    resultado = np.transpose(resultado, [restantes.index(dim) for dim in dimensiones])
+    return resultado[tuple(slice(0, n - 1) for n in resultado.shape)]
+
+
+def _ordenar_desc(valores, etiquetas):
+    """Serie de valores positivos ordenada de mayor a menor (empates por etiqueta)."""
+    orden = np.argsort(-valores, kind='stable')
+    orden = orden[valores[orden] > 0]
+    return pd.Series(valores[orden], index=etiquetas[orden])
+
+
+def _resolver(indicador, conteos, categorias):
+    """Construye el resultado de un indicador a partir de su tabla de conteos densa."""
+    tipo = indicador.tipo
+
+    if tipo in ('conteo', 'proporcion'):
+        serie = _ordenar_desc(conteos, categorias[0])
+        if tipo == 'proporcion':
+            return (serie / serie.sum()).rename('proportion')
+        return serie.rename('count')
+
+    filas_con_datos = conteos.sum(axis=1) > 0
+    conteos = conteos[filas_con_datos]
+    filas = categorias[0][filas_con_datos]
+
+    if tipo == 'tabla':
+        columnas_con_datos = conteos.sum(axis=0) > 0
+        return pd.DataFrame(conteos[:, columnas_con_datos], index=filas, columns=categorias[1][columnas_con_datos])
+
+    if tipo == 'moda':
+        return pd.Series(categorias[1][conteos.argmax(axis=1)], index=filas, name=categorias[1].name)
+
+    if tipo == 'distintos':
+        return pd.Series((conteos > 0).sum(axis=1), index=filas, name=categorias[1].name)
+
+    if tipo == 'top_k':
+        orden = np.argsort(-conteos, axis=1, kind='stable')[:, :indicador.k]
+        valores = np.take_along_axis(conteos, orden, axis=1)
+        fila, posicion = np.nonzero(valores > 0)
+        indice = pd.MultiIndex.from_arrays([filas[fila], categorias[1][orden[fila, posicion]]])
+        return pd.Series(valores[fila, posicion], index=indice, name='count')
+
+    raise ValueError(f"Tipo de indicador desconocido: {tipo}")
+
+
+def calcular_indicadores(datos, solicitados, pesos=None):
+    """Calcula varios indicadores con una sola codificación y el mínimo de pasadas.
+
+    `datos` puede ser el DataFrame de registros o el cubo de conteos (en ese caso
+    `pesos` es la columna de totales). `solicitados` es una lista de nombres del
+    catálogo INDICADORES o un diccionario {nombre: Indicador}.
+    """
+    if not isinstance(solicitados, dict):
+        solicitados = {nombre: INDICADORES[nombre] for nombre in solicitados}
+    if isinstance(pesos, str):
+        pesos = datos[pesos]
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=np.float64)
+
+    # Cada dimensión se codifica una única vez para todos los indicadores
+    dimensiones = list(dict.fromkeys(dim for ind in solicitados.values() for dim in ind.dimensiones))
+    codigos = {dim: _codificar(datos[dim]) for dim in dimensiones}
+    agrupaciones = set(ind.dimensiones for ind in solicitados.values())
+    cardinalidad = {dim: len(codigos[dim][1]) + 1 for dim in dimensiones}
+
+    # Una pasada por tensor; las agrupaciones repetidas se comparten
+    conteos = {}
+    for dims in _agrupar_en_tensores(agrupaciones, cardinalidad):
+        dims_tensor = [dim for dim in dimensiones if dim in dims]
+        tensor = _conteos_densos(codigos, dims_tensor, pesos)
+        for agr in agrupaciones:
+            if set(agr) <= dims and agr not in conteos:
+                conteos[agr] = _marginal(tensor, dims_tensor, agr)
+
+    return {
+        nombre: _resolver(ind, conteos[ind.dimensiones], [codigos[dim][1] for dim in ind.dimensiones])
+        for nombre, ind in solicitados.items()
+    }
+
+
+def calcular_indicadores_cubo(cubo, solicitados):
+    """Atajo: calcula indicadores sobre el cubo, ponderando cada celda por su total."""
+    return calcular_indicadores(cubo, solicitados, pesos=COL_TOTAL)
+
+
+# Particiones de los conteos precalculados para rankings: las dimensiones de los filtros del dashboard
+PARTICIONES_RANKING = (COL_ANIO, COL_REGION, COL_GENERO)
+
+
+class ConteosParticionados:
+    """Conteos densos partición × valor de una dimensión (p. ej. destino o área OCDE).
+
+    Las particiones son las dimensiones de los filtros (año, región, género). Una consulta
+    de top-k o de participación suma solo las particiones seleccionadas y ordena un vector
+    pequeño, sin volver a recorrer el cubo ni los registros.
+    """
+
+    def __init__(self, cubo, dimension, particiones=PARTICIONES_RANKING):
+        self.dimension = dimension
+        self.particiones = [dim for dim in particiones if dim in cubo.columns]
+        dimensiones = [*self.particiones, dimension]
+        codigos = {dim: _codificar(cubo[dim]) for dim in dimensiones}
+        self.etiquetas = {dim: codigos[dim][1] for dim in dimensiones}
+        self.conteos = _conteos_densos(codigos, dimensiones, np.asarray(cubo[COL_TOTAL], dtype=np.float64))
+
+    def _posiciones(self, dim, valores):
+        """Posiciones seleccionadas de una partición; sin selección entran todas (también los nulos)."""
+        if valores is None:
+            return np.arange(self.conteos.shape[self.particiones.index(dim)])
+        return np.flatnonzero(self.etiquetas[dim].isin(valores))
+
+    def fusionar(self, por=None, **selecciones):
+        """Suma las particiones seleccionadas ({columna: valores}; None no filtra).
+
+        Devuelve un vector por valor de la dimensión o, con `por`, una matriz valor × `por`
+        (la última posición de cada eje corresponde a los nulos).
+        """
+        indices = [self._posiciones(dim, selecciones.get(dim)) for dim in self.particiones]
+        seleccion = self.conteos[np.ix_(*indices, np.arange(self.conteos.shape[-1]))]
+        ejes = tuple(i for i, dim in enumerate(self.particiones) if dim != por)
+        resultado = seleccion.sum(axis=ejes)
+        if por is None:
+            return resultado
+
+        eje = self.particiones.index(por)
+        matriz = np.zeros((self.conteos.shape[eje], self.conteos.shape[-1]), dtype=np.int64)
+        matriz[indices[eje]] = resultado
+        return matriz.T
+
+    def top_k(self, k=None, **selecciones):
+        """Valores de la dimensión de mayor a menor conteo (los `k` primeros; None = todos)."""
+        serie = _ordenar_desc(self.fusionar(**selecciones)[:-1], self.etiquetas[self.dimension]).rename('count')
+        return serie if k is None else serie.head(k)
+
+    def participacion(self, **selecciones):
+        """Proporción de cada valor de la dimensión sobre el total de la selección."""
+        serie = self.top_k(**selecciones)
+        return (serie / serie.sum()).rename('proportion')
+
+    def tabla(self, por, **selecciones):
+        """Tabla valor × `por` (p. ej. OCDE × género) de las particiones seleccionadas."""
+        conteos = self.fusionar(por=por, **selecciones)[:-1, :-1]
+        dimensiones = (self.dimension, por)
+        return _resolver(Indicador('tabla', dimensiones), conteos, [self.etiquetas[dim] for dim in dimensiones])
@@ -0,0 +1,330 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from carga_datos import (
+    COL_ANIO, COLUMNAS_CATEGORICAS, FILE_PATH, SHEET_NAME, cargar_dataframe, compactar_dataframe,
+    escribir_atomico, huella_archivo, normalizar_columna, tipar_dataframe, version_datos,
+)
+from cubo import COL_TOTAL, DIMENSIONES, construir_cubo
+from normalizacion import VERSION_NORMALIZACION, canonizar
+
+# Almacén particionado por año de convocatoria (junto al libro):
+#   almacen/manifiesto.json
+#   almacen/anio=2024/registros.parquet   registros limpios de la convocatoria
+#   almacen/anio=2024/cubo.parquet        cubo de conteos de esa partición
+#   almacen/anio=2024/deltas.parquet      registros agregados por deltas a un año del libro
+# El libro Excel siembra las particiones; cada convocatoria nueva se agrega como
+# un archivo delta que solo reescribe su propia partición y su propio cubo. Un delta
+# de un año que ya existe se suma a sus registros (reemplazarlos exige `--reemplazar`).
+ALMACEN_DIR = 'almacen'
+ORIGEN_LIBRO = 'libro'
+ORIGEN_DELTA = 'delta'
+
+# Las sesiones de Streamlit (y la API) son hilos de un mismo proceso: la sincronización
+# y la ingesta se serializan para que un solo hilo escriba el almacén a la vez
+_BLOQUEO_ALMACEN = threading.RLock()
+
+# Cubo precalculado fuera del almacén (p. ej. con `procesamiento_bloques.py` sobre un
+# extracto que no cabe en memoria). Con EQUIDAD_CUBO=ruta.parquet el dashboard y la API
+# sirven ese cubo en lugar del almacén; el detalle de registros no está disponible.
+RUTA_CUBO = os.environ.get('EQUIDAD_CUBO') or None
+
+
+def _ruta_almacen(file_path):
+    return Path(file_path).parent / ALMACEN_DIR
+
+
+def _ruta_particion(directorio, anio):
+    return directorio / f"anio={anio}"
+
+
+def leer_manifiesto(directorio):
+    """Manifiesto del almacén: huella del libro sembrado y una entrada por partición."""
+    try:
+        with open(directorio / 'manifiesto.json', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'libro': None, 'particiones': {}}
+
+
+def _guardar_manifiesto(directorio, manifiesto):
+    texto = json.dumps(manifiesto, indent=2, sort_keys=True)
+    escribir_atomico(directorio / 'manifiesto.json', lambda ruta: ruta.write_text(texto, encoding='utf-8'))
+
+
+def huella_particion(df):
+    """Huella del contenido de una partición (independiente del índice)."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+
+def limpiar_registros(df):
+    """Normalización común de registros nuevos: nombres, tipos, etiquetas canónicas y año obligatorio."""
+    df = tipar_dataframe(df)
+
+    # Etiquetas canónicas de las dimensiones (se aplica sobre los valores distintos)
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            valores = df[col].dropna().unique()
+            df[col] = df[col].map({valor: canonizar(valor, col) for valor in valores})
+
+    return df.dropna(subset=[COL_ANIO]).reset_index(drop=True)
+
+
+def _escribir_particion(directorio, anio, registros, origen, deltas=None, huellas_delta=None):
+    """Escribe los registros y el cubo de una partición; devuelve su entrada de manifiesto.
+
+    `deltas` son los registros que los deltas agregaron a un año del libro (se guardan
+    aparte para conservarlos al resincronizar) y `huellas_delta`, las huellas de los
+    deltas ya ingeridos en la partición.
+    """
+    ruta = _ruta_particion(directorio, anio)
+    ruta.mkdir(parents=True, exist_ok=True)
+    escribir_atomico(ruta / 'registros.parquet', lambda destino: registros.to_parquet(destino, index=False))
+    cubo = construir_cubo(registros)
+    escribir_atomico(ruta / 'cubo.parquet', lambda destino: cubo.to_parquet(destino, index=False))
+    entrada = {'huella': huella_particion(registros), 'origen': origen, 'filas': len(registros)}
+    if deltas is not None:
+        escribir_atomico(ruta / 'deltas.parquet', lambda destino: deltas.to_parquet(destino, index=False))
+        entrada['filas_delta'] = len(deltas)
+    if huellas_delta is not None:
+        entrada['huellas_delta'] = list(huellas_delta)
+    return entrada
+
+
+def _unir(*partes):
+    """Une registros de distintas entradas; las columnas que quedan con tipos mezclados pasan a texto."""
+    return tipar_dataframe(pd.concat(partes, ignore_index=True))
+
+
+def _leer_deltas(directorio, anio, entrada):
+    """Registros agregados por deltas a un año del libro (None si no tiene)."""
+    if not entrada or not entrada.get('filas_delta'):
+        return None
+    return pd.read_parquet(_ruta_particion(directorio, anio) / 'deltas.parquet')
+
+
+def sincronizar_almacen(file_path=FILE_PATH, sheet_name=SHEET_NAME):
+    """Siembra o actualiza las particiones a partir del libro, reescribiendo solo los años que cambiaron.
+
+    Los años que solo vienen de deltas (o que se reemplazaron con un delta) no se tocan,
+    y los registros que los deltas agregaron a un año del libro se conservan.
+    """
+    with _BLOQUEO_ALMACEN:
+        return _sincronizar(file_path, sheet_name)
+
+
+def _sincronizar(file_path, sheet_name):
+    directorio = _ruta_almacen(file_path)
+    manifiesto = leer_manifiesto(directorio)
+    huella_libro = version_datos(file_path, sheet_name)
+    if manifiesto['libro'] == huella_libro:
+        return manifiesto
+
+    directorio.mkdir(exist_ok=True)
+    df = limpiar_registros(cargar_dataframe(file_path, sheet_name))
+
+    # Años que ya no están en el libro (y no vinieron de un delta) se retiran del manifiesto;
+    # si tenían registros agregados por deltas, la partición queda solo con ellos
+    anios_libro = {str(anio) for anio in df[COL_ANIO].unique()}
+    for clave, entrada in list(manifiesto['particiones'].items()):
+        if entrada['origen'] == ORIGEN_LIBRO and clave not in anios_libro:
+            deltas = _leer_deltas(directorio, clave, entrada)
+            if deltas is None:
+                del manifiesto['particiones'][clave]
+            else:
+                manifiesto['particiones'][clave] = _escribir_particion(
+                    directorio, clave, deltas, ORIGEN_DELTA, huellas_delta=entrada.get('huellas_delta', []),
+                )
+
+    for anio, registros in df.groupby(COL_ANIO, sort=True):
+        clave = str(anio)
+        entrada = manifiesto['particiones'].get(clave)
+        if entrada and entrada['origen'] == ORIGEN_DELTA:
+            continue
+        registros = registros.reset_index(drop=True)
+        deltas = _leer_deltas(directorio, anio, entrada)
+        if deltas is not None:
+            registros = _unir(registros, deltas)
+        if entrada and entrada['huella'] == huella_particion(registros):
+            continue
+        manifiesto['particiones'][clave] = _escribir_particion(
+            directorio, anio, registros, ORIGEN_LIBRO, deltas, entrada.get('huellas_delta') if deltas is not None else None,
+        )
+
+    manifiesto['libro'] = huella_libro
+    _guardar_manifiesto(directorio, manifiesto)
+    return manifiesto
+
+
+def leer_delta(ruta, sheet_name=None):
+    """Lee un archivo delta de una convocatoria (xlsx o CSV) como texto: los tipos los fija el almacén."""
+    ruta = Path(ruta)
+    if ruta.suffix.lower() in ('.xlsx', '.xls'):
+        return pd.read_excel(ruta, sheet_name=sheet_name or 0, dtype=str)
+    if ruta.suffix.lower() == '.csv':
+        return pd.read_csv(ruta, dtype=str)
+    raise ValueError(f"Formato no soportado para el delta: {ruta.suffix} (use .xlsx o .csv)")
+
+
+def ingerir_delta(ruta, anio=None, file_path=FILE_PATH, sheet_name=None, reemplazar=False):
+    """Agrega los registros de un archivo delta a la partición de su convocatoria.
+
+    Si el año ya existe, el delta se suma a sus registros y se reconstruye su cubo; con
+    `reemplazar` la partición queda solo con el delta. Devuelve las entradas de manifiesto
+    nueva y anterior (None si el año no existía).
+    """
+    registros = limpiar_registros(leer_delta(ruta, sheet_name))
+
+    faltantes = [col for col in DIMENSIONES if col not in registros.columns]
+    if faltantes:
+        raise ValueError(f"El delta no contiene las columnas: {faltantes}")
+
+    anios = sorted(int(a) for a in registros[COL_ANIO].unique())
+    if anio is None:
+        if len(anios) != 1:
+            raise ValueError(f"El delta debe contener una sola convocatoria; encontrados: {anios}")
+        anio = anios[0]
+    elif any(a != anio for a in anios):
+        raise ValueError(f"El delta contiene años distintos de {anio}: {anios}")
+
+    directorio = _ruta_almacen(file_path)
+    with _BLOQUEO_ALMACEN:
+        manifiesto = sincronizar_almacen(file_path)
+        registros = ajustar_tipos(registros, tipos_almacen(directorio, manifiesto))
+        huella_delta = huella_particion(registros)
+        anterior = manifiesto['particiones'].get(str(anio))
+
+        if anterior is None or reemplazar:
+            nueva = _escribir_particion(directorio, anio, registros, ORIGEN_DELTA, huellas_delta=[huella_delta])
+        else:
+            huellas = anterior.get('huellas_delta', [])
+            if huella_delta in huellas:
+                raise ValueError(f"Este delta ya se ingirió en la partición {anio} (use --reemplazar para rehacerla).")
+            existentes = pd.read_parquet(_ruta_particion(directorio, anio) / 'registros.parquet')
+            combinados = _unir(existentes, registros)
+            if anterior['origen'] == ORIGEN_LIBRO:
+                # Los registros del delta se guardan aparte para sumarlos de nuevo si cambia el libro
+                previos = _leer_deltas(directorio, anio, anterior)
+                deltas = registros if previos is None else _unir(previos, registros)
+                nueva = _escribir_particion(directorio, anio, combinados, ORIGEN_LIBRO, deltas, [*huellas, huella_delta])
+            else:
+                nueva = _escribir_particion(directorio, anio, combinados, ORIGEN_DELTA, huellas_delta=[*huellas, huella_delta])
+
+        manifiesto['particiones'][str(anio)] = nueva
+        _guardar_manifiesto(directorio, manifiesto)
+    return nueva, anterior
+
+
+def tipos_almacen(directorio, manifiesto):
+    """Tipos de columna de las particiones existentes (leídos del esquema Parquet, sin cargar registros)."""
+    import pyarrow.parquet as pq
+
+    for anio in sorted(manifiesto['particiones']):
+        esquema = pq.read_schema(_ruta_particion(directorio, anio) / 'registros.parquet')
+        return esquema.empty_table().to_pandas().dtypes
+    return pd.Series(dtype=object)
+
+
+def ajustar_tipos(registros, tipos):
+    """Lleva las columnas de un delta a los tipos del almacén; las columnas nuevas quedan como texto."""
+    for col in registros.columns:
+        tipo = tipos.get(col)
+        if tipo is None or col == COL_ANIO or pd.api.types.is_string_dtype(tipo) or tipo == object:
+            continue
+        if pd.api.types.is_datetime64_any_dtype(tipo):
+            registros[col] = pd.to_datetime(registros[col], errors='coerce')
+        elif pd.api.types.is_numeric_dtype(tipo):
+            numeros = pd.to_numeric(registros[col], errors='coerce')
+            # Enteros sin nulos en el delta conservan el tipo entero del almacén
+            registros[col] = numeros if numeros.isna().any() else numeros.astype(tipo)
+    return registros
+
+
+def version_almacen(manifiesto):
+    """Huella de la versión de datos del almacén (cambia cuando cambia cualquier partición)."""
+    huellas = {anio: entrada['huella'] for anio, entrada in manifiesto['particiones'].items()}
+    return hashlib.sha256(json.dumps(huellas, sort_keys=True).encode()).hexdigest()
+
+
+def _leer_particiones(file_path, manifiesto, archivo):
+    directorio = _ruta_almacen(file_path)
+    partes = [pd.read_parquet(_ruta_particion(directorio, anio) / archivo) for anio in sorted(manifiesto['particiones'])]
+    return pd.concat(partes, ignore_index=True)
+
+
+def cargar_registros(manifiesto, file_path=FILE_PATH):
+    """Registros de todas las particiones en representación compacta (categórica)."""
+    return compactar_dataframe(_leer_particiones(file_path, manifiesto, 'registros.parquet'))
+
+
+def _normalizar_cubo(cubo):
+    dimensiones = [col for col in DIMENSIONES if col in cubo.columns]
+    for col in dimensiones:
+        if col != COL_ANIO:
+            cubo[col] = normalizar_columna(cubo[col], col)
+    return cubo.groupby(dimensiones, observed=True, dropna=False)[COL_TOTAL].sum().reset_index()
+
+
+def cargar_cubo_almacen(manifiesto, file_path=FILE_PATH):
+    """Cubo completo: unión de los cubos por partición (las celdas no se solapan entre años).
+
+    Las dimensiones se vuelven a llevar a sus etiquetas canónicas, por si algún delta
+    se ingirió con tablas de normalización anteriores, y las celdas que coinciden se suman.
+    """
+    return _normalizar_cubo(_leer_particiones(file_path, manifiesto, 'cubo.parquet'))
+
+
+def version_cubo(ruta):
+    """Huella de un cubo precalculado: contenido del archivo y versión de las tablas de normalización."""
+    return hashlib.sha256(f"{huella_archivo(ruta)}:{VERSION_NORMALIZACION}".encode()).hexdigest()
+
+
+def cargar_cubo_externo(ruta):
+    """Cubo precalculado fuera del almacén; como en el almacén, se omiten las celdas sin año."""
+    return _normalizar_cubo(pd.read_parquet(ruta).dropna(subset=[COL_ANIO]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Almacén de registros particionado por año de convocatoria.")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    subcomandos.add_parser('sincronizar', help="Siembra o actualiza las particiones desde el libro Excel.")
+
+    ingerir = subcomandos.add_parser('ingerir', help="Agrega la partición de una convocatoria desde un delta.")
+    ingerir.add_argument('ruta', help="Archivo delta (.xlsx o .csv) con los registros de un año.")
+    ingerir.add_argument('--anio', type=int, default=None, help="Año de la convocatoria (se infiere si se omite).")
+    ingerir.add_argument('--hoja', default=None, help="Hoja del delta cuando es un libro Excel.")
+    ingerir.add_argument('--reemplazar', action='store_true',
+                         help="Reemplaza los registros del año por los del delta en lugar de agregarlos.")
+
+    subcomandos.add_parser('listar', help="Muestra las particiones del almacén.")
+
+    args = parser.parse_args()
+    if args.comando == 'sincronizar':
+        manifiesto = sincronizar_almacen()
+        print(f"Almacén sincronizado: {len(manifiesto['particiones'])} particiones.")
+    elif args.comando == 'ingerir':
+        try:
+            nueva, anterior = ingerir_delta(args.ruta, args.anio, sheet_name=args.hoja, reemplazar=args.reemplazar)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Error al ingerir el delta: {e}")
+        else:
+            if anterior is None:
+                print(f"Partición agregada: {nueva['filas']} registros (origen: {nueva['origen']}).")
+            elif args.reemplazar:
+                print(f"Partición reemplazada: {anterior['filas']} registros ({anterior['origen']}) "
+                      f"sustituidos por {nueva['filas']} del delta.")
+            else:
+                print(f"Partición ampliada: {anterior['filas']} registros existentes + "
+                      f"{nueva['filas'] - anterior['filas']} del delta = {nueva['filas']} (origen: {nueva['origen']}).")
+    else:
+        manifiesto = sincronizar_almacen()
+        for anio, entrada in sorted(manifiesto['particiones'].items()):
+            deltas = f", {entrada['filas_delta']} de deltas" if entrada.get('filas_delta') else ""
+            print(f"{anio}: {entrada['filas']} registros ({entrada['origen']}{deltas})")
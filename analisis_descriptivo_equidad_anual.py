@@ -1,10 +1,16 @@
+import argparse
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
 
-# Configuración para que Matplotlib muestre tildes y caracteres especiales
-plt.rcParams['font.family'] = 'DejaVu Sans'
+import cache_figuras
+from cache_figuras import guardar_figura, modulos_graficos, reportar_grafico
+from carga_datos import cargar_dataframe, normalizar_columna
+from cubo import contar, conteo, tabla_cruzada
+from normalizacion import GENERO_MUJER
+from procesamiento_bloques import FILAS_POR_BLOQUE, cubo_por_bloques, leer_bloques
+
+# matplotlib y seaborn se importan al dibujar el primer gráfico (`modulos_graficos`),
+# así que el modo --sin-graficos y las figuras ya en caché no cargan la pila de gráficos.
 
 # --- Configuración Inicial ---
 FILE_PATH = 'Dataframe1.xlsx'
@@ -16,27 +22,32 @@ COL_DEPARTAMENTO = 'Depto_nacimi'
 COL_AREA = 'OCDE'
 COL_ANIO = 'Año de la convocatoria' # Nueva columna para el análisis anual
 
-def cargar_y_limpiar_datos(file_path, sheet_name):
-    """Carga los datos y realiza una limpieza básica."""
-    try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
-        
-        # Limpieza de nombres de columna (eliminando espacios al inicio/final)
-        df.columns = [col.strip() for col in df.columns]
-        
-        # Limpieza básica: convertir a mayúsculas para evitar errores de case-sensitivity
-        # y convertir a string para evitar errores de tipo
-        df[COL_GENERO] = df[COL_GENERO].astype(str).str.upper().str.strip()
-        df[COL_DEPARTAMENTO] = df[COL_DEPARTAMENTO].astype(str).str.upper().str.strip()
-        df[COL_AREA] = df[COL_AREA].astype(str).str.upper().str.strip()
-        
-        # Asegurar que la columna de año sea numérica y filtrar valores no válidos
-        df[COL_ANIO] = pd.to_numeric(df[COL_ANIO], errors='coerce').astype('Int64')
+# Columnas que necesitan los análisis (las únicas que se leen en el modo por bloques)
+DIMENSIONES_ANALISIS = [COL_ANIO, COL_GENERO, COL_DEPARTAMENTO, COL_AREA]
 
-        # Filtrar datos nulos en columnas clave
-        df.dropna(subset=[COL_GENERO, COL_DEPARTAMENTO, COL_AREA, COL_ANIO], inplace=True)
+def limpiar_datos(df):
+    """Realiza una limpieza básica de los registros ya cargados."""
+    # Limpieza de nombres de columna (eliminando espacios al inicio/final)
+    df.columns = [col.strip() for col in df.columns]
+    
+    # Etiquetas canónicas (tildes, mayúsculas y variantes unificadas por tabla;
+    # se aplica sobre las categorías distintas, no fila a fila)
+    for col in [COL_GENERO, COL_DEPARTAMENTO, COL_AREA]:
+        df[col] = normalizar_columna(df[col], col)
+    
+    # Asegurar que la columna de año sea numérica y filtrar valores no válidos
+    df[COL_ANIO] = pd.to_numeric(df[COL_ANIO], errors='coerce').astype('Int64')
+
+    # Filtrar datos nulos en columnas clave
+    df.dropna(subset=[COL_GENERO, COL_DEPARTAMENTO, COL_AREA, COL_ANIO], inplace=True)
 
-        return df
+    return df
+
+def cargar_y_limpiar_datos(file_path, sheet_name):
+    """Carga los datos (desde la instantánea Parquet) y realiza una limpieza básica."""
+    try:
+        df = cargar_dataframe(file_path, sheet_name, compacto=True)
+        return limpiar_datos(df)
     except FileNotFoundError:
         print(f"Error: Archivo no encontrado en la ruta: {file_path}")
         return None
@@ -47,19 +58,53 @@ def cargar_y_limpiar_datos(file_path, sheet_name):
         print(f"Error al cargar o limpiar los datos: {e}")
         return None
 
+def cargar_y_limpiar_por_bloques(ruta, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Versión por bloques para extractos grandes: devuelve el cubo de conteos de los datos limpios.
+
+    Los análisis aceptan indistintamente los registros o este cubo.
+    """
+    try:
+        bloques = leer_bloques(ruta, filas_por_bloque, columnas=DIMENSIONES_ANALISIS)
+        return cubo_por_bloques(bloques, limpiar=limpiar_datos, dimensiones=DIMENSIONES_ANALISIS)
+    except FileNotFoundError:
+        print(f"Error: Archivo no encontrado en la ruta: {ruta}")
+        return None
+    except KeyError as e:
+        print(f"Error: Columna {e} no encontrada. Verifique los nombres de las columnas en el archivo.")
+        return None
+    except Exception as e:
+        print(f"Error al cargar o limpiar los datos por bloques: {e}")
+        return None
+
+def _grafico_evolucion_proporcion(proporcion_mujeres, titulo):
+    plt, sns = modulos_graficos()
+    plt.figure(figsize=(10, 6))
+    sns.lineplot(x=proporcion_mujeres.index, y=proporcion_mujeres, marker='o')
+    plt.title(titulo)
+    plt.ylabel('Proporción de Mujeres Financiadas (%)')
+    plt.xlabel('Año de la Convocatoria')
+    plt.grid(axis='y', linestyle='--')
+
+def _grafico_evolucion_regional(df_top_5):
+    plt, _ = modulos_graficos()
+    plt.figure(figsize=(12, 7))
+    df_top_5.plot(kind='line', marker='o', ax=plt.gca())
+    plt.title('Evolución Anual del Número de Becas Financiadas (Top 5 Departamentos)')
+    plt.ylabel('Número de Becas Financiadas')
+    plt.xlabel('Año de la Convocatoria')
+    plt.grid(axis='y', linestyle='--')
+    plt.legend(title='Departamento', bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+
 def analisis_temporal_genero(df):
     """Analiza la distribución de becas por género a lo largo de los años."""
     print("\n--- 1. Análisis Temporal por Género ---")
 
     # 1.1 Distribución de becas por año y género
-    distribucion_anual = df.groupby([COL_ANIO, COL_GENERO]).size().unstack(fill_value=0)
+    distribucion_anual = tabla_cruzada(df, COL_ANIO, COL_GENERO)
     
     # 1.2 Calcular la proporción de mujeres por año
-    col_mujeres = None
-    for col in distribucion_anual.columns:
-        if 'F' in col or 'FEMENINO' in col or 'MUJER' in col:
-            col_mujeres = col
-            break
+    col_mujeres = GENERO_MUJER if GENERO_MUJER in distribucion_anual.columns else None
     
     if col_mujeres:
         distribucion_anual['TOTAL'] = distribucion_anual.sum(axis=1)
@@ -69,15 +114,11 @@ def analisis_temporal_genero(df):
         print(distribucion_anual[[col_mujeres, 'TOTAL', 'PROPORCION_MUJERES']])
 
         # 1.3 Visualización: Evolución de la Proporción de Mujeres
-        plt.figure(figsize=(10, 6))
-        sns.lineplot(x=distribucion_anual.index, y=distribucion_anual['PROPORCION_MUJERES'], marker='o')
-        plt.title('Evolución Anual de la Proporción de Mujeres Financiadas')
-        plt.ylabel('Proporción de Mujeres Financiadas (%)')
-        plt.xlabel('Año de la Convocatoria')
-        plt.grid(axis='y', linestyle='--')
-        plt.savefig('evolucion_proporcion_mujeres.png')
-        plt.close()
-        print("Gráfico 'evolucion_proporcion_mujeres.png' generado.")
+        renderizado = guardar_figura(
+            'evolucion_proporcion_mujeres.png', distribucion_anual['PROPORCION_MUJERES'], _grafico_evolucion_proporcion,
+            titulo='Evolución Anual de la Proporción de Mujeres Financiadas',
+        )
+        reportar_grafico('evolucion_proporcion_mujeres.png', renderizado)
 
     else:
         print("\nADVERTENCIA: No se pudo identificar la columna de mujeres para el análisis temporal. Verifique los valores de la columna 'Sexo'.")
@@ -88,66 +129,84 @@ def analisis_temporal_regional(df):
     print("\n--- 2. Análisis Temporal Regional ---")
 
     # 2.1 Departamentos que han ganado más relevancia anualmente (ej. los que crecen más rápido)
-    distribucion_anual_regional = df.groupby([COL_ANIO, COL_DEPARTAMENTO]).size().unstack(fill_value=0)
+    distribucion_anual_regional = tabla_cruzada(df, COL_ANIO, COL_DEPARTAMENTO)
     
     # 2.2 Visualización: Evolución de los Top 5 Departamentos
-    top_5_departamentos = df[COL_DEPARTAMENTO].value_counts().head(5).index
+    top_5_departamentos = conteo(df, COL_DEPARTAMENTO).head(5).index
     df_top_5 = distribucion_anual_regional[top_5_departamentos]
     
-    plt.figure(figsize=(12, 7))
-    df_top_5.plot(kind='line', marker='o', ax=plt.gca())
-    plt.title('Evolución Anual del Número de Becas Financiadas (Top 5 Departamentos)')
-    plt.ylabel('Número de Becas Financiadas')
-    plt.xlabel('Año de la Convocatoria')
-    plt.grid(axis='y', linestyle='--')
-    plt.legend(title='Departamento', bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.tight_layout()
-    plt.savefig('evolucion_regional.png')
-    plt.close()
-    print("Gráfico 'evolucion_regional.png' generado.")
+    renderizado = guardar_figura('evolucion_regional.png', df_top_5, _grafico_evolucion_regional)
+    reportar_grafico('evolucion_regional.png', renderizado)
+
+def proporcion_mujeres_anual(df, grupos=(COL_AREA,)):
+    """Serie anual de la proporción de mujeres para todos los grupos a la vez (tabla larga).
+
+    Un único conteo por (grupos..., año, género); `grupos` puede ser, por ejemplo,
+    (COL_AREA,), (COL_DEPARTAMENTO,) o (COL_AREA, COL_DEPARTAMENTO).
+    Devuelve None si no se identifica la columna de mujeres.
+    """
+    conteos = contar(df, [*grupos, COL_ANIO, COL_GENERO]).unstack(fill_value=0)
+
+    col_mujeres = GENERO_MUJER if GENERO_MUJER in conteos.columns else None
+
+    if not col_mujeres:
+        return None
+
+    tabla = pd.DataFrame({'TOTAL': conteos.sum(axis=1), 'MUJERES': conteos[col_mujeres]})
+    tabla['PROPORCION_MUJERES'] = (tabla['MUJERES'] / tabla['TOTAL']) * 100
+    return tabla.reset_index()
+
+def _grafico_evolucion_por_grupo(tabla, grupo, columnas):
+    _, sns = modulos_graficos()
+    graficos = sns.relplot(
+        data=tabla, x=COL_ANIO, y='PROPORCION_MUJERES', col=grupo, col_wrap=columnas,
+        kind='line', marker='o', height=3, aspect=1.4,
+    )
+    graficos.set_titles('{col_name}')
+    graficos.set_axis_labels('Año de la Convocatoria', 'Proporción de Mujeres (%)')
+    for eje in graficos.axes.flat:
+        eje.grid(axis='y', linestyle='--')
+    graficos.figure.suptitle('Evolución de la Proporción de Mujeres Financiadas por Área de Conocimiento')
+    graficos.tight_layout()
+    graficos.figure.subplots_adjust(top=0.9)
 
 def analisis_temporal_area(df):
     """Analiza la distribución de becas por área de conocimiento a lo largo de los años."""
     print("\n--- 3. Análisis Temporal por Área de Conocimiento ---")
 
-    # 3.1 Evolución de la proporción de mujeres en INGENIERÍA Y TECNOLOGÍA (ejemplo de brecha)
-    df_area = df[df[COL_AREA] == 'INGENIERÍA Y TECNOLOGÍA']
-    
-    if not df_area.empty:
-        distribucion_anual_area = df_area.groupby([COL_ANIO, COL_GENERO]).size().unstack(fill_value=0)
-        
-        col_mujeres = None
-        for col in distribucion_anual_area.columns:
-            if 'F' in col or 'FEMENINO' in col or 'MUJER' in col:
-                col_mujeres = col
-                break
-        
-        if col_mujeres:
-            distribucion_anual_area['TOTAL'] = distribucion_anual_area.sum(axis=1)
-            distribucion_anual_area['PROPORCION_MUJERES'] = (distribucion_anual_area[col_mujeres] / distribucion_anual_area['TOTAL']) * 100
-            
-            print("\n3.1 Evolución de la Proporción de Mujeres en INGENIERÍA Y TECNOLOGÍA:")
-            print(distribucion_anual_area[['PROPORCION_MUJERES']])
-
-            # 3.2 Visualización: Evolución de la Proporción de Mujeres en Ingeniería
-            plt.figure(figsize=(10, 6))
-            sns.lineplot(x=distribucion_anual_area.index, y=distribucion_anual_area['PROPORCION_MUJERES'], marker='o')
-            plt.title('Evolución de la Proporción de Mujeres Financiadas en Ingeniería y Tecnología')
-            plt.ylabel('Proporción de Mujeres Financiadas (%)')
-            plt.xlabel('Año de la Convocatoria')
-            plt.grid(axis='y', linestyle='--')
-            plt.savefig('evolucion_mujeres_ingenieria.png')
-            plt.close()
-            print("Gráfico 'evolucion_mujeres_ingenieria.png' generado.")
-        else:
-            print("\nADVERTENCIA: No se pudo identificar la columna de mujeres para el análisis temporal por área.")
+    # 3.1 Evolución de la proporción de mujeres en todas las áreas (una sola pasada)
+    tabla = proporcion_mujeres_anual(df, grupos=(COL_AREA,))
+
+    if tabla is None:
+        print("\nADVERTENCIA: No se pudo identificar la columna de mujeres para el análisis temporal por área.")
+    elif tabla.empty:
+        print("\nADVERTENCIA: No hay datos por área de conocimiento después de la limpieza.")
     else:
-        print("\nADVERTENCIA: No hay datos para 'INGENIERÍA Y TECNOLOGÍA' después de la limpieza.")
+        print("\n3.1 Evolución de la Proporción de Mujeres por Área de Conocimiento (%):")
+        print(tabla.pivot(index=COL_ANIO, columns=COL_AREA, values='PROPORCION_MUJERES').round(2).to_string())
+
+        # 3.2 Visualización: un panel por área (small multiples) a partir de la tabla larga
+        renderizado = guardar_figura(
+            'evolucion_mujeres_por_area.png', tabla, _grafico_evolucion_por_grupo, grupo=COL_AREA, columnas=3,
+        )
+        reportar_grafico('evolucion_mujeres_por_area.png', renderizado)
 
 
 if __name__ == "__main__":
-    # 1. Cargar y Limpiar Datos
-    df_analisis = cargar_y_limpiar_datos(FILE_PATH, SHEET_NAME)
+    parser = argparse.ArgumentParser(description="Análisis descriptivo anual de equidad por género, región y área OCDE.")
+    parser.add_argument('--por-bloques', metavar='RUTA', default=None,
+                        help="Procesa por bloques un extracto grande (.parquet, .csv o .xlsx) en lugar del libro.")
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE)
+    parser.add_argument('--sin-graficos', action='store_true',
+                        help="Solo resultados en texto: no genera PNG ni importa matplotlib/seaborn.")
+    args = parser.parse_args()
+    cache_figuras.GRAFICOS_ACTIVOS = not args.sin_graficos
+
+    # 1. Cargar y Limpiar Datos (registros completos, o cubo de conteos en el modo por bloques)
+    if args.por_bloques:
+        df_analisis = cargar_y_limpiar_por_bloques(args.por_bloques, args.filas_por_bloque)
+    else:
+        df_analisis = cargar_y_limpiar_datos(FILE_PATH, SHEET_NAME)
 
     if df_analisis is not None:
         # 2. Análisis Temporal por Género
@@ -160,4 +219,7 @@ if __name__ == "__main__":
         analisis_temporal_area(df_analisis)
 
         print("\n--- Proceso de Análisis Descriptivo Anual Finalizado ---")
-        print("Los resultados en texto se muestran arriba. Los gráficos se guardaron como PNG en el directorio actual.")
+        if args.sin_graficos:
+            print("Los resultados en texto se muestran arriba (modo sin gráficos).")
+        else:
+            print("Los resultados en texto se muestran arriba. Los gráficos se guardaron como PNG en el directorio actual.")
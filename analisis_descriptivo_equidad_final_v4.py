@@ -1,10 +1,14 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
+import argparse
 
-# Configuración para que Matplotlib muestre tildes y caracteres especiales
-plt.rcParams['font.family'] = 'DejaVu Sans'
+import cache_figuras
+from cache_figuras import guardar_figura, modulos_graficos, reportar_grafico
+from carga_datos import cargar_dataframe, normalizar_columna
+from cubo import conteo, tabla_cruzada
+from normalizacion import GENERO_MUJER
+from procesamiento_bloques import FILAS_POR_BLOQUE, cubo_por_bloques, leer_bloques
+
+# matplotlib y seaborn se importan al dibujar el primer gráfico (`modulos_graficos`),
+# así que el modo --sin-graficos y las figuras ya en caché no cargan la pila de gráficos.
 
 # --- Configuración Inicial ---
 FILE_PATH = 'Dataframe1.xlsx'
@@ -15,27 +19,32 @@ COL_GENERO = 'Sexo'
 COL_DEPARTAMENTO = 'Depto_nacimi'
 COL_AREA = 'OCDE'
 
+# Columnas que necesitan los análisis (las únicas que se leen en el modo por bloques)
+DIMENSIONES_ANALISIS = [COL_GENERO, COL_DEPARTAMENTO, COL_AREA]
+
 # Lógica confirmada por el usuario: TODOS SON FINANCIADOS.
 # El análisis se centra en la distribución de la oportunidad.
 
-def cargar_y_limpiar_datos(file_path, sheet_name):
-    """Carga los datos y realiza una limpieza básica."""
-    try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
-        
-        # Limpieza de nombres de columna (eliminando espacios al inicio/final)
-        df.columns = [col.strip() for col in df.columns]
-        
-        # Limpieza básica: convertir a mayúsculas para evitar errores de case-sensitivity
-        # y convertir a string para evitar errores de tipo
-        df[COL_GENERO] = df[COL_GENERO].astype(str).str.upper().str.strip()
-        df[COL_DEPARTAMENTO] = df[COL_DEPARTAMENTO].astype(str).str.upper().str.strip()
-        df[COL_AREA] = df[COL_AREA].astype(str).str.upper().str.strip()
+def limpiar_datos(df):
+    """Realiza una limpieza básica de los registros ya cargados."""
+    # Limpieza de nombres de columna (eliminando espacios al inicio/final)
+    df.columns = [col.strip() for col in df.columns]
+    
+    # Etiquetas canónicas (tildes, mayúsculas y variantes unificadas por tabla;
+    # se aplica sobre las categorías distintas, no fila a fila)
+    for col in [COL_GENERO, COL_DEPARTAMENTO, COL_AREA]:
+        df[col] = normalizar_columna(df[col], col)
 
-        # Filtrar datos nulos en columnas clave
-        df.dropna(subset=[COL_GENERO, COL_DEPARTAMENTO, COL_AREA], inplace=True)
+    # Filtrar datos nulos en columnas clave
+    df.dropna(subset=[COL_GENERO, COL_DEPARTAMENTO, COL_AREA], inplace=True)
 
-        return df
+    return df
+
+def cargar_y_limpiar_datos(file_path, sheet_name):
+    """Carga los datos (desde la instantánea Parquet) y realiza una limpieza básica."""
+    try:
+        df = cargar_dataframe(file_path, sheet_name, compacto=True)
+        return limpiar_datos(df)
     except FileNotFoundError:
         print(f"Error: Archivo no encontrado en la ruta: {file_path}")
         return None
@@ -46,13 +55,60 @@ def cargar_y_limpiar_datos(file_path, sheet_name):
         print(f"Error al cargar o limpiar los datos: {e}")
         return None
 
+def cargar_y_limpiar_por_bloques(ruta, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Versión por bloques para extractos grandes: devuelve el cubo de conteos de los datos limpios.
+
+    Los análisis aceptan indistintamente los registros o este cubo.
+    """
+    try:
+        bloques = leer_bloques(ruta, filas_por_bloque, columnas=DIMENSIONES_ANALISIS)
+        return cubo_por_bloques(bloques, limpiar=limpiar_datos, dimensiones=DIMENSIONES_ANALISIS)
+    except FileNotFoundError:
+        print(f"Error: Archivo no encontrado en la ruta: {ruta}")
+        return None
+    except KeyError as e:
+        print(f"Error: Columna {e} no encontrada. Verifique los nombres de las columnas en el archivo.")
+        return None
+    except Exception as e:
+        print(f"Error al cargar o limpiar los datos por bloques: {e}")
+        return None
+
+def _grafico_distribucion_genero(distribucion_genero):
+    plt, sns = modulos_graficos()
+    plt.figure(figsize=(8, 6))
+    sns.barplot(x=distribucion_genero.index, y=distribucion_genero.values, palette="viridis")
+    plt.title('Distribución de Becas Financiadas por Género')
+    plt.ylabel('Número de Becas Financiadas')
+    plt.xlabel('Género')
+    plt.grid(axis='y', linestyle='--')
+
+def _grafico_distribucion_regional(top_departamentos):
+    plt, sns = modulos_graficos()
+    plt.figure(figsize=(12, 7))
+    sns.barplot(x=top_departamentos.index, y=top_departamentos.values, palette="magma")
+    plt.title('Top 10 Departamentos con Mayor Número de Becas Financiadas')
+    plt.ylabel('Número de Becas Financiadas')
+    plt.xlabel('Departamento de Nacimiento')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+
+def _grafico_proporcion_mujeres_area(proporcion_mujeres):
+    plt, sns = modulos_graficos()
+    plt.figure(figsize=(12, 7))
+    sns.barplot(x=proporcion_mujeres.index, y=proporcion_mujeres.values, palette="coolwarm")
+    plt.title('Top 10 Áreas de Conocimiento con Menor Proporción de Mujeres Financiadas')
+    plt.ylabel('Proporción de Mujeres Financiadas (%)')
+    plt.xlabel('Área de Conocimiento (OCDE)')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+
 def analisis_descriptivo_genero(df):
     """Realiza el análisis descriptivo por género (Distribución de la Oportunidad)."""
     print("\n--- 1. Análisis Descriptivo por Género (Distribución de la Oportunidad) ---")
 
     # 1.1 Distribución de aspirantes financiados por género
-    distribucion_genero = df[COL_GENERO].value_counts()
-    distribucion_genero_pct = df[COL_GENERO].value_counts(normalize=True).mul(100).round(2)
+    distribucion_genero = conteo(df, COL_GENERO)
+    distribucion_genero_pct = conteo(df, COL_GENERO, normalize=True).mul(100).round(2)
     
     print("\n1.1 Distribución de Aspirantes Financiados por Género:")
     print(distribucion_genero)
@@ -60,56 +116,37 @@ def analisis_descriptivo_genero(df):
     print(distribucion_genero_pct)
 
     # 1.3 Visualización: Distribución por Género
-    plt.figure(figsize=(8, 6))
-    sns.barplot(x=distribucion_genero.index, y=distribucion_genero.values, palette="viridis")
-    plt.title('Distribución de Becas Financiadas por Género')
-    plt.ylabel('Número de Becas Financiadas')
-    plt.xlabel('Género')
-    plt.grid(axis='y', linestyle='--')
-    plt.savefig('distribucion_genero.png')
-    plt.close()
-    print("Gráfico 'distribucion_genero.png' generado.")
+    renderizado = guardar_figura('distribucion_genero.png', distribucion_genero, _grafico_distribucion_genero)
+    reportar_grafico('distribucion_genero.png', renderizado)
 
 def analisis_descriptivo_regional(df):
     """Realiza el análisis descriptivo por región (Distribución de la Oportunidad)."""
     print("\n--- 2. Análisis Descriptivo Regional (Distribución de la Oportunidad) ---")
 
     # 2.1 Top 10 de Departamentos con más aspirantes financiados
-    top_departamentos = df[COL_DEPARTAMENTO].value_counts().head(10)
+    top_departamentos = conteo(df, COL_DEPARTAMENTO).head(10)
     print("\n2.1 Top 10 Departamentos con Mayor Número de Becas Financiadas:")
     print(top_departamentos)
 
     # 2.2 Visualización: Distribución Regional (Top 10)
-    plt.figure(figsize=(12, 7))
-    sns.barplot(x=top_departamentos.index, y=top_departamentos.values, palette="magma")
-    plt.title('Top 10 Departamentos con Mayor Número de Becas Financiadas')
-    plt.ylabel('Número de Becas Financiadas')
-    plt.xlabel('Departamento de Nacimiento')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.savefig('distribucion_regional.png')
-    plt.close()
-    print("Gráfico 'distribucion_regional.png' generado.")
+    renderizado = guardar_figura('distribucion_regional.png', top_departamentos, _grafico_distribucion_regional)
+    reportar_grafico('distribucion_regional.png', renderizado)
 
 def analisis_brecha_genero_area(df):
     """Analiza la distribución de género por Área de Conocimiento (OCDE)."""
     print("\n--- 3. Análisis de Brecha de Género por Área de Conocimiento (OCDE) ---")
 
     # 3.1 Distribución de Becas por Género y Área de Conocimiento
-    distribucion_brecha = df.groupby([COL_AREA, COL_GENERO]).size().unstack(fill_value=0)
+    distribucion_brecha = tabla_cruzada(df, COL_AREA, COL_GENERO)
     
     # 3.2 Calcular la proporción de mujeres por área (para medir la equidad)
     
     # Se calcula el total de becas por área
     distribucion_brecha['TOTAL'] = distribucion_brecha.sum(axis=1)
     
-    # Se intenta identificar la columna de mujeres (asumiendo 'F' o 'FEMENINO' es el valor)
-    col_mujeres = None
-    for col in distribucion_brecha.columns:
-        if 'F' in col or 'FEMENINO' in col or 'MUJER' in col:
-            col_mujeres = col
-            break
-    
+    # Columna de mujeres: etiqueta canónica de la normalización
+    col_mujeres = GENERO_MUJER if GENERO_MUJER in distribucion_brecha.columns else None
+
     if col_mujeres:
         distribucion_brecha['PROPORCION_MUJERES'] = (distribucion_brecha[col_mujeres] / distribucion_brecha['TOTAL']) * 100
         distribucion_brecha = distribucion_brecha.sort_values(by='PROPORCION_MUJERES', ascending=True)
@@ -118,16 +155,9 @@ def analisis_brecha_genero_area(df):
         print(distribucion_brecha[['TOTAL', col_mujeres, 'PROPORCION_MUJERES']].head(10))
 
         # 3.3 Visualización: Proporción de Mujeres por Área (Top 10)
-        plt.figure(figsize=(12, 7))
-        sns.barplot(x=distribucion_brecha['PROPORCION_MUJERES'].head(10).index, y=distribucion_brecha['PROPORCION_MUJERES'].head(10).values, palette="coolwarm")
-        plt.title('Top 10 Áreas de Conocimiento con Menor Proporción de Mujeres Financiadas')
-        plt.ylabel('Proporción de Mujeres Financiadas (%)')
-        plt.xlabel('Área de Conocimiento (OCDE)')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.savefig('proporcion_mujeres_area.png')
-        plt.close()
-        print("Gráfico 'proporcion_mujeres_area.png' generado.")
+        proporcion_mujeres = distribucion_brecha['PROPORCION_MUJERES'].head(10)
+        renderizado = guardar_figura('proporcion_mujeres_area.png', proporcion_mujeres, _grafico_proporcion_mujeres_area)
+        reportar_grafico('proporcion_mujeres_area.png', renderizado)
 
     else:
         print("\nADVERTENCIA: No se pudo identificar la columna de mujeres para calcular la proporción. Verifique los valores de la columna 'Sexo'.")
@@ -135,8 +165,20 @@ def analisis_brecha_genero_area(df):
 
 
 if __name__ == "__main__":
-    # 1. Cargar y Limpiar Datos
-    df_analisis = cargar_y_limpiar_datos(FILE_PATH, SHEET_NAME)
+    parser = argparse.ArgumentParser(description="Análisis descriptivo de equidad por género, región y área OCDE.")
+    parser.add_argument('--por-bloques', metavar='RUTA', default=None,
+                        help="Procesa por bloques un extracto grande (.parquet, .csv o .xlsx) en lugar del libro.")
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE)
+    parser.add_argument('--sin-graficos', action='store_true',
+                        help="Solo resultados en texto: no genera PNG ni importa matplotlib/seaborn.")
+    args = parser.parse_args()
+    cache_figuras.GRAFICOS_ACTIVOS = not args.sin_graficos
+
+    # 1. Cargar y Limpiar Datos (registros completos, o cubo de conteos en el modo por bloques)
+    if args.por_bloques:
+        df_analisis = cargar_y_limpiar_por_bloques(args.por_bloques, args.filas_por_bloque)
+    else:
+        df_analisis = cargar_y_limpiar_datos(FILE_PATH, SHEET_NAME)
 
     if df_analisis is not None:
         # 2. Análisis Descriptivo por Género
@@ -149,4 +191,7 @@ if __name__ == "__main__":
         analisis_brecha_genero_area(df_analisis)
 
         print("\n--- Proceso de Análisis Descriptivo Finalizado ---")
-        print("Los resultados en texto se muestran arriba. Los gráficos se guardaron como PNG en el directorio actual.")
+        if args.sin_graficos:
+            print("Los resultados en texto se muestran arriba (modo sin gráficos).")
+        else:
+            print("Los resultados en texto se muestran arriba. Los gráficos se guardaron como PNG en el directorio actual.")
@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from almacen import RUTA_CUBO, cargar_cubo_almacen, cargar_cubo_externo, sincronizar_almacen, version_almacen, version_cubo
+from carga_datos import FILE_PATH
+from cubo import COL_ANIO, COL_DESTINO, COL_GENERO, COL_REGION
+from indicadores import (
+    construir_proyecciones, construir_rankings, indicadores_filtrados, indicadores_globales, proyeccion, sexo_ocde,
+)
+from proyeccion import DIMENSIONES_PROYECCION, Proyecciones
+
+# API HTTP/JSON de los indicadores de equidad, con los mismos filtros que la barra
+# lateral del dashboard (parámetros repetibles: ?anio=2023&anio=2024&region=Caribe&genero=Femenino;
+# sin valores se toman todas las opciones). Cada respuesta lleva un ETag derivado de la
+# versión de los datos y de los filtros: los clientes revalidan con If-None-Match (304) y
+# las respuestas ya calculadas se comparten entre todos los clientes.
+PUERTO = 8502
+
+# Respuestas memorizadas (las menos usadas se descartan)
+MAX_RESPUESTAS = 256
+
+# Segundos entre comprobaciones de la versión del almacén
+INTERVALO_VERSION = 2.0
+
+TOP_N_OCDE = 10
+
+
+class Datos(NamedTuple):
+    """Datos de una versión: cubo, conteos por partición, proyecciones e indicadores globales."""
+    version: str
+    cubo: pd.DataFrame
+    rankings: dict
+    proyecciones: Proyecciones
+    globales: dict
+
+
+def a_json(valor):
+    """Indicador en forma JSON: tablas y series como lista de registros, escalares nativos."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        if not (isinstance(valor.index, pd.RangeIndex) and valor.index.name is None):
+            valor = valor.reset_index()
+        return json.loads(valor.to_json(orient='records', force_ascii=False))
+    if isinstance(valor, pd.Index):
+        return json.loads(valor.to_series().to_json(orient='values', force_ascii=False))
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return valor
+
+
+def leer_filtros(parametros, globales):
+    """Filtros (año, región, género) de la consulta, ordenados para que la misma selección comparta caché."""
+    años = [int(anio) for anio in parametros.getlist('anio')] or [int(anio) for anio in globales["opciones_anos"]]
+    regiones = parametros.getlist('region') or globales["opciones_regiones"]
+    generos = parametros.getlist('genero') or globales["opciones_generos"]
+    return tuple(sorted(años)), tuple(sorted(regiones)), tuple(sorted(generos))
+
+
+def cuerpo_indicadores(datos, años, regiones, generos):
+    """Indicadores del dashboard para una selección de filtros."""
+    ind = indicadores_filtrados(datos.cubo, datos.rankings, años, regiones, generos)
+    globales = datos.globales
+    particiones = {COL_ANIO: años, COL_REGION: regiones, COL_GENERO: generos}
+
+    equidad = globales["equidad_destino_pct"]
+    pais_por_region = globales["pais_por_region"]
+    movilidad = globales["movilidad_por_region"]
+    destinos_por_anio = datos.rankings[COL_DESTINO].tabla(COL_ANIO, **particiones)
+
+    cuerpo = {
+        "version": datos.version,
+        "filtros": {"anio": list(años), "region": list(regiones), "genero": list(generos)},
+        "total": ind["total"],
+        "total_hombres": ind["total_hombres"],
+        "total_mujeres": ind["total_mujeres"],
+        "destinos_unicos": ind["destinos_unicos"],
+        "genero_global": ind["genero_global"],
+        "genero_por_ano": ind["genero_por_ano"],
+        "genero_por_region": ind["genero_por_region"],
+        "genero_por_destino": ind["genero_por_destino"],
+        "participacion_por_pais": ind["participacion_por_pais"],
+        "top5_destinos": ind["top5"],
+        "brecha_equidad_destino": equidad[equidad.index.isin(ind["destinos"])],
+        "pais_por_region": pais_por_region[pais_por_region.index.isin(regiones)],
+        "movilidad_por_region": movilidad[movilidad.index.isin(regiones)],
+        "diversidad_destinos_ano": (destinos_por_anio > 0).sum().rename("destinos_distintos"),
+    }
+    for opcional in ["sexo_modalidad", "conteo_ocde"]:
+        if opcional in ind:
+            cuerpo[opcional] = ind[opcional]
+    return {clave: a_json(valor) for clave, valor in cuerpo.items()}
+
+
+class ServicioIndicadores:
+    """Mantiene los datos de la versión vigente y la caché de respuestas por ETag."""
+
+    def __init__(self, file_path=FILE_PATH, ruta_cubo=RUTA_CUBO):
+        self.file_path = file_path
+        self.ruta_cubo = ruta_cubo
+        self.datos = None
+        self.respuestas = OrderedDict()
+        self._en_curso = {}
+        self._ultima_comprobacion = 0.0
+        self._bloqueo = asyncio.Lock()
+
+    def _cargar(self):
+        """Revisa la versión de los datos (almacén o cubo precalculado) y los recarga solo si cambió (en un hilo)."""
+        if self.ruta_cubo:
+            version = version_cubo(self.ruta_cubo)
+        else:
+            manifiesto = sincronizar_almacen(self.file_path)
+            version = version_almacen(manifiesto)
+        if self.datos is None or self.datos.version != version:
+            if self.ruta_cubo:
+                cubo = cargar_cubo_externo(self.ruta_cubo)
+            else:
+                cubo = cargar_cubo_almacen(manifiesto, self.file_path)
+            self.datos = Datos(
+                version, cubo, construir_rankings(cubo), construir_proyecciones(cubo), indicadores_globales(cubo)
+            )
+            self.respuestas.clear()
+        return self.datos
+
+    async def datos_vigentes(self):
+        async with self._bloqueo:
+            if self.datos is None or time.monotonic() - self._ultima_comprobacion > INTERVALO_VERSION:
+                await asyncio.to_thread(self._cargar)
+                self._ultima_comprobacion = time.monotonic()
+            return self.datos
+
+    async def responder(self, request, recurso, calcular):
+        """Respuesta JSON con ETag; 304 si el cliente ya la tiene, y cálculo compartido si no está en caché."""
+        datos = await self.datos_vigentes()
+        clave = json.dumps([datos.version, recurso], sort_keys=True, default=str)
+        etag = f'"{hashlib.sha256(clave.encode()).hexdigest()[:32]}"'
+        encabezados = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+        if etag in request.headers.get('if-none-match', ''):
+            return Response(status_code=304, headers=encabezados)
+
+        cuerpo = self.respuestas.get(etag)
+        if cuerpo is not None:
+            self.respuestas.move_to_end(etag)
+        else:
+            # Las consultas simultáneas con la misma clave esperan un único cálculo
+            tarea = self._en_curso.get(etag)
+            if tarea is None:
+                tarea = asyncio.ensure_future(asyncio.to_thread(
+                    lambda: json.dumps(calcular(datos), ensure_ascii=False).encode('utf-8')
+                ))
+                self._en_curso[etag] = tarea
+                tarea.add_done_callback(lambda _: self._en_curso.pop(etag, None))
+            cuerpo = await asyncio.shield(tarea)
+            self.respuestas[etag] = cuerpo
+            while len(self.respuestas) > MAX_RESPUESTAS:
+                self.respuestas.popitem(last=False)
+
+        return Response(cuerpo, media_type='application/json', headers=encabezados)
+
+
+def crear_app(file_path=FILE_PATH, ruta_cubo=RUTA_CUBO):
+    servicio = ServicioIndicadores(file_path, ruta_cubo)
+
+    async def opciones(request):
+        return await servicio.responder(request, ['opciones'], lambda datos: {
+            "version": datos.version,
+            "anio": a_json(pd.Index(datos.globales["opciones_anos"])),
+            "region": a_json(pd.Index(datos.globales["opciones_regiones"])),
+            "genero": a_json(pd.Index(datos.globales["opciones_generos"])),
+        })
+
+    async def indicadores(request):
+        datos = await servicio.datos_vigentes()
+        try:
+            filtros = leer_filtros(request.query_params, datos.globales)
+        except ValueError:
+            return JSONResponse({"error": "El parámetro 'anio' debe ser un número entero."}, status_code=400)
+        return await servicio.responder(request, ['indicadores', *filtros], lambda datos: cuerpo_indicadores(datos, *filtros))
+
+    async def ocde(request):
+        datos = await servicio.datos_vigentes()
+        try:
+            filtros = leer_filtros(request.query_params, datos.globales)
+            top_n = request.query_params.get('top_n', str(TOP_N_OCDE))
+            top_n = top_n if top_n == "Todos" else int(top_n)
+            if top_n != "Todos" and top_n < 1:
+                raise ValueError(top_n)
+        except ValueError:
+            return JSONResponse(
+                {"error": "Los parámetros 'anio' y 'top_n' deben ser enteros, con 'top_n' >= 1 ('top_n' admite 'Todos')."},
+                status_code=400,
+            )
+
+        def calcular(datos):
+            tabla, _ = sexo_ocde(datos.rankings, *filtros, top_n)
+            return {"version": datos.version, "top_n": top_n, "sexo_ocde": a_json(tabla.reset_index(drop=True))}
+
+        return await servicio.responder(request, ['ocde', *filtros, top_n], calcular)
+
+    async def proyeccion_seleccion(request):
+        datos = await servicio.datos_vigentes()
+        try:
+            # El filtro de año no aplica: las tendencias usan todos los años de la selección
+            _, regiones, generos = leer_filtros(request.query_params, datos.globales)
+        except ValueError:
+            return JSONResponse({"error": "El parámetro 'anio' debe ser un número entero."}, status_code=400)
+        dimension = request.query_params.get('dimension', DIMENSIONES_PROYECCION[0])
+        if dimension not in DIMENSIONES_PROYECCION:
+            return JSONResponse({"error": f"'dimension' debe ser una de {DIMENSIONES_PROYECCION}."}, status_code=400)
+
+        def calcular(datos):
+            tabla = proyeccion(datos.proyecciones, regiones, generos, dimension)
+            return {"version": datos.version, "dimension": dimension, "proyeccion": a_json(tabla)}
+
+        return await servicio.responder(request, ['proyeccion', regiones, generos, dimension], calcular)
+
+    return Starlette(routes=[
+        Route('/opciones', opciones),
+        Route('/indicadores', indicadores),
+        Route('/indicadores/ocde', ocde),
+        Route('/indicadores/proyeccion', proyeccion_seleccion),
+    ])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="API HTTP/JSON de los indicadores de equidad.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=PUERTO)
+    parser.add_argument('--libro', default=FILE_PATH, help="Libro Excel que siembra el almacén.")
+    parser.add_argument('--cubo', metavar='RUTA', default=RUTA_CUBO,
+                        help="Cubo Parquet precalculado (p. ej. con procesamiento_bloques.py) a servir en lugar del almacén.")
+    args = parser.parse_args()
+
+    uvicorn.run(crear_app(args.libro, args.cubo), host=args.host, port=args.puerto)
@@ -0,0 +1,243 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Backend sin interfaz gráfica para medir el renderizado de los gráficos
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+import analisis_descriptivo_equidad_anual as anual
+import analisis_descriptivo_equidad_final_v4 as descriptivo
+import cache_figuras
+from agregaciones import INDICADORES, ConteosParticionados, calcular_indicadores, calcular_indicadores_cubo
+from carga_datos import FILE_PATH, SHEET_NAME, cargar_dataframe, compactar_dataframe
+from cubo import COL_ANIO, COL_AREA, COL_DESTINO, COL_GENERO, COL_REGION, construir_cubo
+from datos_sinteticos import generar_escala
+from generar_reportes import ANALISIS
+from indice_filtros import IndiceBitmap
+from normalizacion import GENERO_MUJER
+from proyeccion import Proyecciones
+
+ESCALAS_POR_DEFECTO = [1, 10]
+
+# Presupuesto de arranque (--importacion): segundos de importación de cada módulo de
+# entrada por encima de la de pandas, medidos en un proceso nuevo. Ninguno debe cargar
+# la pila de gráficos; matplotlib y seaborn se importan al dibujar el primer gráfico.
+PRESUPUESTO_IMPORTACION = {
+    'analisis_descriptivo_equidad_final_v4': 0.15,
+    'analisis_descriptivo_equidad_anual': 0.15,
+    'generar_reportes': 0.15,
+    'indicadores': 0.15,
+    'almacen': 0.15,
+    'exportacion': 0.05,
+}
+MODULOS_GRAFICOS = ['matplotlib', 'seaborn']
+REPETICIONES_IMPORTACION = 5
+
+
+def medir(etapa, funcion, memoria=True):
+    """Tiempo de pared de `funcion()` y, si se pide, su pico de memoria en una segunda ejecución."""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+
+    pico_mb = None
+    if memoria:
+        # El rastreo de memoria añade sobrecarga, por eso no se mezcla con la medición de tiempo
+        tracemalloc.start()
+        funcion()
+        pico_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    return resultado, {'etapa': etapa, 'segundos': round(segundos, 6), 'memoria_pico_mb': None if pico_mb is None else round(pico_mb, 3)}
+
+
+def _seleccion_tipica(df):
+    """Selección de filtros representativa: la mitad de los años, todas las regiones, un género."""
+    anios = sorted(df[COL_ANIO].dropna().unique())
+    return {
+        COL_ANIO: anios[len(anios) // 2:],
+        COL_REGION: sorted(df[COL_REGION].dropna().unique()),
+        COL_GENERO: [GENERO_MUJER],
+    }
+
+
+def ejecutar_escala(escala, base, memoria=True, excel=False):
+    """Mide todas las etapas del pipeline sobre datos sintéticos de una escala dada."""
+    resultados = []
+
+    def registrar(etapa, funcion):
+        valor, medicion = medir(etapa, funcion, memoria)
+        resultados.append(medicion)
+        return valor
+
+    df_sintetico = generar_escala(escala, base=base)
+
+    # Carga: el libro Excel solo se mide a escala 1 (su formato no admite más de ~1M filas)
+    if excel and escala == 1:
+        registrar('carga_excel', lambda: pd.read_excel(FILE_PATH, sheet_name=SHEET_NAME))
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'registros.parquet')
+        df_sintetico.to_parquet(ruta, index=False)
+        df = registrar('carga_parquet', lambda: pd.read_parquet(ruta))
+
+    df = registrar('compactar', lambda: compactar_dataframe(df.copy()))
+
+    # Limpieza de los scripts de análisis
+    df_limpio = registrar('limpiar_descriptivo', lambda: descriptivo.limpiar_datos(df.copy()))
+    registrar('limpiar_anual', lambda: anual.limpiar_datos(df.copy()))
+
+    # Filtros: máscara isin (antes) frente al índice de mapas de bits
+    seleccion = _seleccion_tipica(df)
+    registrar('filtro_isin', lambda: np.flatnonzero(np.logical_and.reduce([df[col].isin(valores) for col, valores in seleccion.items()])))
+    indice = registrar('indice_construir', lambda: IndiceBitmap(df))
+    registrar('indice_filtrar', lambda: indice.seleccionar(**seleccion))
+
+    # Indicadores: cubo y cada indicador del dashboard
+    cubo = registrar('cubo_construir', lambda: construir_cubo(df))
+    registrar('indicadores_todos_registros', lambda: calcular_indicadores(df, list(INDICADORES)))
+    registrar('indicadores_todos_cubo', lambda: calcular_indicadores_cubo(cubo, list(INDICADORES)))
+    for nombre in INDICADORES:
+        registrar(f'indicador:{nombre}', lambda nombre=nombre: calcular_indicadores_cubo(cubo, [nombre]))
+
+    # Rankings: conteos por partición y consulta de top-k sobre la selección
+    ranking = registrar('ranking_construir', lambda: ConteosParticionados(cubo, COL_AREA))
+    registrar('ranking_top_k', lambda: ranking.top_k(10, **seleccion))
+
+    # Proyecciones: ajuste en lote de todas las series y consulta de una selección
+    proyecciones = registrar('proyeccion_ajustar', lambda: Proyecciones(cubo))
+    registrar('proyeccion_consulta', lambda: proyecciones.tabla(COL_DESTINO, **{
+        col: valores for col, valores in seleccion.items() if col != COL_ANIO
+    }))
+
+    # Gráficos: cada análisis con salida de texto descartada y sin caché de figuras
+    cache_figuras.CACHE_FIGURAS_ACTIVA = False
+    directorio_actual = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)
+        try:
+            for _, funcion in ANALISIS:
+                def analizar(funcion=funcion):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        funcion(df_limpio)
+                registrar(f'grafico:{funcion.__name__}', analizar)
+        finally:
+            os.chdir(directorio_actual)
+            cache_figuras.CACHE_FIGURAS_ACTIVA = True
+
+    for medicion in resultados:
+        medicion.update({'escala': escala, 'filas': len(df)})
+    return resultados
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def tiempo_importacion(modulo):
+    """Segundos de `import modulo` en un proceso nuevo (-X importtime) y módulos de gráficos que cargó."""
+    codigo = f"import sys, {modulo}; print(','.join(m for m in {MODULOS_GRAFICOS!r} if m in sys.modules))"
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    microsegundos = next(
+        int(linea.split('|')[1]) for linea in reversed(proceso.stderr.splitlines())
+        if linea.startswith('import time:') and linea.split('|')[2].strip() == modulo
+    )
+    return microsegundos / 1e6, [m for m in proceso.stdout.strip().split(',') if m]
+
+
+def verificar_importacion(repeticiones=REPETICIONES_IMPORTACION):
+    """Compara el arranque de cada módulo de entrada con su presupuesto; devuelve las regresiones."""
+    base = min(tiempo_importacion('pandas')[0] for _ in range(repeticiones))
+    print(f"pandas (base): {base:.3f} s")
+    regresiones = []
+    for modulo, presupuesto in PRESUPUESTO_IMPORTACION.items():
+        mediciones = [tiempo_importacion(modulo) for _ in range(repeticiones)]
+        extra = max(min(segundos for segundos, _ in mediciones) - base, 0.0)
+        graficos = sorted({m for _, cargados in mediciones for m in cargados})
+        print(f"{modulo}: +{extra:.3f} s (presupuesto {presupuesto:.3f} s)" + (f", carga {graficos}" if graficos else ""))
+        if extra > presupuesto:
+            regresiones.append(f"{modulo} tarda +{extra:.3f} s en importarse (presupuesto {presupuesto:.3f} s)")
+        if graficos:
+            regresiones.append(f"{modulo} importa la pila de gráficos al arrancar: {graficos}")
+    return regresiones
+
+
+def comparar(actual, anterior, tolerancia):
+    """Etapas cuyo tiempo empeoró más que `tolerancia` (cociente) respecto a una ejecución anterior."""
+    previos = {(m['escala'], m['etapa']): m for m in anterior['resultados']}
+    regresiones = []
+    for medicion in actual['resultados']:
+        previo = previos.get((medicion['escala'], medicion['etapa']))
+        if previo and previo['segundos'] > 0:
+            cociente = medicion['segundos'] / previo['segundos']
+            if cociente > tolerancia:
+                regresiones.append((medicion['escala'], medicion['etapa'], previo['segundos'], medicion['segundos'], cociente))
+    return regresiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de equidad con datos sintéticos.")
+    parser.add_argument('--escalas', type=float, nargs='+', default=ESCALAS_POR_DEFECTO,
+                        help="Múltiplos del tamaño de la muestra (p. ej. 1 10 100 1000).")
+    parser.add_argument('--salida', default='benchmark_resultados.json', help="Archivo JSON de resultados.")
+    parser.add_argument('--sin-memoria', action='store_true', help="No medir el pico de memoria (más rápido).")
+    parser.add_argument('--excel', action='store_true', help="Medir también la lectura del libro Excel (escala 1).")
+    parser.add_argument('--comparar', default=None, help="JSON de una ejecución anterior para detectar regresiones.")
+    parser.add_argument('--tolerancia', type=float, default=1.25, help="Cociente de tiempo a partir del cual hay regresión.")
+    parser.add_argument('--importacion', action='store_true',
+                        help="Solo verificar el presupuesto de tiempo de importación (sale con error si se excede).")
+    args = parser.parse_args()
+
+    if args.importacion:
+        regresiones = verificar_importacion()
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+        sys.exit(1 if regresiones else 0)
+
+    base = cargar_dataframe(FILE_PATH, SHEET_NAME)
+    reporte = {
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _commit_actual(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'resultados': [],
+    }
+    for escala in args.escalas:
+        escala = int(escala) if float(escala).is_integer() else escala
+        print(f"Escala {escala}x ...")
+        reporte['resultados'] += ejecutar_escala(escala, base, memoria=not args.sin_memoria, excel=args.excel)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+    tabla = pd.DataFrame(reporte['resultados']).pivot(index='etapa', columns='escala', values='segundos')
+    print(tabla.round(4).to_string())
+    print(f"\nResultados guardados en '{args.salida}'.")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regresiones = comparar(reporte, json.load(f), args.tolerancia)
+        for escala, etapa, antes, ahora, cociente in regresiones:
+            print(f"REGRESIÓN escala {escala}x, {etapa}: {antes:.4f} s -> {ahora:.4f} s ({cociente:.2f}x)")
+        if regresiones:
+            sys.exit(1)
@@ -0,0 +1,84 @@
+import functools
+import hashlib
+import inspect
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from carga_datos import escribir_atomico
+
+# Caché de figuras direccionada por contenido: la clave de cada PNG es la huella
+# de la tabla agregada que se grafica, los parámetros del gráfico y el código de
+# la función que lo dibuja. Si la clave ya existe, se copia el PNG sin renderizar.
+CACHE_FIGURAS_DIR = Path(__file__).resolve().parent / '.cache' / 'figuras'
+
+# Se desactiva, por ejemplo, en el benchmark para medir siempre el renderizado
+CACHE_FIGURAS_ACTIVA = True
+
+# Modo solo texto (--sin-graficos): no se generan PNG y nunca se importa matplotlib ni seaborn
+GRAFICOS_ACTIVOS = True
+
+
+@functools.cache
+def modulos_graficos():
+    """pyplot y seaborn, importados y configurados la primera vez que se dibuja (no al importar los scripts)."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Configuración para que Matplotlib muestre tildes y caracteres especiales
+    plt.rcParams['font.family'] = 'DejaVu Sans'
+    return plt, sns
+
+
+def huella_figura(datos, dibujar, parametros):
+    """Huella SHA-256 de una figura: datos (valores, índice y nombres), parámetros y código."""
+    sha = hashlib.sha256()
+    sha.update(pd.util.hash_pandas_object(datos, index=True).values.tobytes())
+    nombres = list(datos.columns) if isinstance(datos, pd.DataFrame) else [datos.name]
+    sha.update(repr((nombres, list(datos.index.names))).encode('utf-8'))
+    sha.update(json.dumps(parametros, sort_keys=True, default=str).encode('utf-8'))
+    sha.update(inspect.getsource(dibujar).encode('utf-8'))
+    return sha.hexdigest()
+
+
+def guardar_figura(ruta_png, datos, dibujar, **parametros):
+    """Guarda en `ruta_png` la figura de `dibujar(datos, **parametros)`, renderizándola solo si cambió.
+
+    Devuelve True si la figura se renderizó, False si se tomó de la caché y None en el
+    modo sin gráficos. Con la figura en caché tampoco se importa la pila de gráficos.
+    """
+    if not GRAFICOS_ACTIVOS:
+        return None
+
+    if not CACHE_FIGURAS_ACTIVA:
+        plt, _ = modulos_graficos()
+        dibujar(datos, **parametros)
+        plt.savefig(ruta_png)
+        plt.close()
+        return True
+
+    en_cache = CACHE_FIGURAS_DIR / f"{huella_figura(datos, dibujar, parametros)}.png"
+    if en_cache.exists():
+        shutil.copyfile(en_cache, ruta_png)
+        return False
+
+    plt, _ = modulos_graficos()
+    dibujar(datos, **parametros)
+    CACHE_FIGURAS_DIR.mkdir(parents=True, exist_ok=True)
+    # El temporal de escribir_atomico termina en .tmp: el formato se indica explícitamente
+    escribir_atomico(en_cache, lambda destino: plt.savefig(destino, format='png'))
+    plt.close()
+    shutil.copyfile(en_cache, ruta_png)
+    return True
+
+
+def reportar_grafico(nombre_archivo, renderizado):
+    """Informa si el gráfico se generó, si se reutilizó el de la caché (datos sin cambios) o si se omitió."""
+    if renderizado is None:
+        print(f"Gráfico '{nombre_archivo}' omitido (modo sin gráficos).")
+    elif renderizado:
+        print(f"Gráfico '{nombre_archivo}' generado.")
+    else:
+        print(f"Gráfico '{nombre_archivo}' sin cambios (reutilizado de la caché).")
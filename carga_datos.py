@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from normalizacion import VERSION_NORMALIZACION, canonizar
+
+# --- Configuración Inicial ---
+FILE_PATH = 'Dataframe1.xlsx'
+SHEET_NAME = 'Hoja1'
+
+# Directorio (junto al libro) donde se guardan las instantáneas Parquet
+CACHE_DIR = '.cache'
+
+COL_ANIO = 'Año de la convocatoria'
+
+# Columnas de dimensión que en modo compacto se codifican como categóricas
+# (diccionario de valores + códigos enteros pequeños).
+COLUMNAS_CATEGORICAS = [
+    'Sexo', 'Depto_nacimi', 'Región de nacimiento', 'Pais de Estudios', 'OCDE', 'Modalidad',
+    'Ambito', 'Pais de nacimiento', 'Programa Minciencias',
+]
+
+# Otras columnas de texto se codifican si tienen pocos valores distintos
+# respecto al número de filas (instituciones, programas, códigos).
+PROPORCION_MAX_DISTINTOS = 0.5
+
+# Lógica de la caché: el libro Excel solo se vuelve a leer con openpyxl cuando
+# su contenido cambia. La huella se calcula con SHA-256, pero si el tamaño y la
+# fecha de modificación coinciden con el manifiesto se reutiliza sin releer.
+
+
+def _rutas_cache(file_path, sheet_name):
+    """Devuelve el directorio de caché y la ruta del manifiesto de un libro/hoja."""
+    origen = Path(file_path)
+    directorio = origen.parent / CACHE_DIR
+    prefijo = f"{origen.stem}_{sheet_name}"
+    return directorio, directorio / f"{prefijo}.json", prefijo
+
+
+def _leer_manifiesto(ruta_manifiesto):
+    try:
+        with open(ruta_manifiesto, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def escribir_atomico(ruta, escribir):
+    """Escribe en un temporal y lo renombra, para no dejar archivos a medias entre sesiones.
+
+    El temporal tiene nombre único (mkstemp): varios hilos del mismo proceso pueden
+    escribir la misma ruta sin pisarse; gana el último `os.replace`.
+    """
+    descriptor, temporal = tempfile.mkstemp(dir=ruta.parent, prefix=f"{ruta.name}.", suffix='.tmp')
+    os.close(descriptor)
+    temporal = Path(temporal)
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    except BaseException:
+        temporal.unlink(missing_ok=True)
+        raise
+
+
+def _actualizar_manifiesto(file_path, ruta_manifiesto, manifiesto, huella):
+    """Guarda huella, fecha de modificación y tamaño actuales del libro si difieren del manifiesto."""
+    estado = os.stat(file_path)
+    nuevo = {'huella': huella, 'mtime': estado.st_mtime_ns, 'tamano': estado.st_size}
+    if nuevo != manifiesto:
+        ruta_manifiesto.parent.mkdir(exist_ok=True)
+        escribir_atomico(ruta_manifiesto, lambda ruta: ruta.write_text(json.dumps(nuevo), encoding='utf-8'))
+
+
+def huella_archivo(file_path, manifiesto=None):
+    """Calcula la huella SHA-256 del archivo, reutilizando la del manifiesto si no cambió."""
+    estado = os.stat(file_path)
+    if manifiesto and manifiesto.get('mtime') == estado.st_mtime_ns and manifiesto.get('tamano') == estado.st_size:
+        return manifiesto['huella']
+
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def tipar_dataframe(df):
+    """Limpieza común a todos los puntos de entrada: nombres de columna y tipos."""
+    df.columns = [str(col).strip() for col in df.columns]
+
+    if COL_ANIO in df.columns:
+        df[COL_ANIO] = pd.to_numeric(df[COL_ANIO], errors='coerce').astype('Int64')
+
+    # Columnas con tipos mezclados (p. ej. NIT o códigos DANE con números y texto)
+    # se guardan como texto para que el formato columnar tenga un tipo único.
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+
+    return df
+
+
+def transformar_valores(serie, funcion):
+    """Aplica `funcion` a cada valor; en columnas categóricas solo a las categorías distintas."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        nuevas = pd.Index([funcion(str(cat)) for cat in serie.cat.categories])
+        unicas = nuevas.unique()
+        # Las categorías que colapsan al mismo valor comparten código; el código -1 (nulo) se conserva
+        mapa = np.append(unicas.get_indexer(nuevas), -1)
+        codigos = mapa[serie.cat.codes.to_numpy()]
+        return pd.Series(pd.Categorical.from_codes(codigos, categories=unicas), index=serie.index, name=serie.name)
+    return serie.astype(str).map(funcion)
+
+
+def normalizar_columna(serie, columna=None):
+    """Etiquetas canónicas de una columna; cada valor distinto pasa una sola vez por la tabla."""
+    columna = columna or serie.name
+    return transformar_valores(serie.astype('category'), lambda valor: canonizar(valor, columna))
+
+
+def compactar_dataframe(df):
+    """Codifica las dimensiones como categóricas canónicas y el año como entero pequeño."""
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = normalizar_columna(df[col], col)
+
+    for col in df.columns.difference(COLUMNAS_CATEGORICAS, sort=False):
+        if pd.api.types.is_string_dtype(df[col]) and df[col].nunique() <= PROPORCION_MAX_DISTINTOS * len(df):
+            df[col] = df[col].astype('category')
+
+    if COL_ANIO in df.columns:
+        anio = df[COL_ANIO]
+        df[COL_ANIO] = anio.astype('int16') if not anio.isna().any() else anio.astype('Int16')
+
+    return df
+
+
+def reporte_memoria(df_original, df_compacto):
+    """Compara el uso de memoria (bytes, incluyendo cadenas) por columna entre dos representaciones."""
+    reporte = pd.DataFrame({
+        'Original (KB)': df_original.memory_usage(deep=True, index=False) / 1024,
+        'Compacto (KB)': df_compacto.memory_usage(deep=True, index=False) / 1024,
+    })
+    reporte.loc['TOTAL'] = reporte.sum()
+    reporte['Reducción (x)'] = reporte['Original (KB)'] / reporte['Compacto (KB)']
+    return reporte.round(2)
+
+
+def normalizar_destino(df):
+    """País de destino canónico usado por el dashboard (también como columna "Destino Pais")."""
+    df["Pais de Estudios"] = normalizar_columna(df["Pais de Estudios"], "Pais de Estudios")
+    df["Destino Pais"] = df["Pais de Estudios"]
+    return df
+
+
+def cargar_dataframe(file_path=FILE_PATH, sheet_name=SHEET_NAME, compacto=False):
+    """Carga el libro desde la instantánea Parquet, regenerándola solo si el Excel cambió.
+
+    Con `compacto=True` las columnas de dimensión se devuelven como categóricas.
+    """
+    directorio, ruta_manifiesto, prefijo = _rutas_cache(file_path, sheet_name)
+    manifiesto = _leer_manifiesto(ruta_manifiesto)
+    huella = huella_archivo(file_path, manifiesto)
+    ruta_instantanea = directorio / f"{prefijo}_{huella[:16]}.parquet"
+
+    if manifiesto.get('huella') == huella and ruta_instantanea.exists():
+        df = pd.read_parquet(ruta_instantanea)
+    else:
+        df = tipar_dataframe(pd.read_excel(file_path, sheet_name=sheet_name))
+        directorio.mkdir(exist_ok=True)
+        escribir_atomico(ruta_instantanea, lambda ruta: df.to_parquet(ruta, index=False))
+
+        # Eliminar instantáneas obsoletas del mismo libro/hoja
+        for anterior in directorio.glob(f"{prefijo}_*.parquet"):
+            if anterior != ruta_instantanea:
+                anterior.unlink(missing_ok=True)
+
+    # Actualizar el manifiesto (también cuando solo cambió la fecha de modificación)
+    _actualizar_manifiesto(file_path, ruta_manifiesto, manifiesto, huella)
+
+    if compacto:
+        return compactar_dataframe(df)
+    return df
+
+
+def version_datos(file_path=FILE_PATH, sheet_name=SHEET_NAME):
+    """Devuelve la huella de la versión actual de los datos (para claves de caché).
+
+    Combina el contenido del libro con la versión de las tablas de normalización.
+    """
+    _, ruta_manifiesto, _ = _rutas_cache(file_path, sheet_name)
+    manifiesto = _leer_manifiesto(ruta_manifiesto)
+    huella = huella_archivo(file_path, manifiesto)
+    # Si solo cambió la fecha de modificación, la instantánea sigue vigente: se anota la
+    # nueva fecha para no volver a calcular el SHA-256 del libro en cada consulta
+    if manifiesto.get('huella') == huella:
+        _actualizar_manifiesto(file_path, ruta_manifiesto, manifiesto, huella)
+    return hashlib.sha256(f"{huella}:{VERSION_NORMALIZACION}".encode()).hexdigest()
+
+
+if __name__ == "__main__":
+    # Reporte de memoria: representación original (texto) frente a la compacta (categórica)
+    df_original = cargar_dataframe(FILE_PATH, SHEET_NAME)
+    df_compacto = compactar_dataframe(df_original.copy())
+    print("Uso de memoria por columna:")
+    print(reporte_memoria(df_original, df_compacto).to_string())
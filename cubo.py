@@ -0,0 +1,83 @@
+import pandas as pd
+
+# Dimensiones del cubo de conteos. Cada celda del cubo es una combinación
+# observada de estas columnas con el número de becas financiadas.
+COL_ANIO = 'Año de la convocatoria'
+COL_REGION = 'Región de nacimiento'
+COL_DEPARTAMENTO = 'Depto_nacimi'
+COL_GENERO = 'Sexo'
+COL_DESTINO = 'Pais de Estudios'
+COL_MODALIDAD = 'Modalidad'
+COL_AREA = 'OCDE'
+
+DIMENSIONES = [COL_ANIO, COL_REGION, COL_DEPARTAMENTO, COL_GENERO, COL_DESTINO, COL_MODALIDAD, COL_AREA]
+COL_TOTAL = 'Total'
+
+
+def construir_cubo(df, dimensiones=DIMENSIONES):
+    """Agrega los registros en un cubo de conteos (una fila por celda observada)."""
+    dimensiones = [col for col in dimensiones if col in df.columns]
+    return df.groupby(dimensiones, observed=True, dropna=False).size().reset_index(name=COL_TOTAL)
+
+
+def filtrar_cubo(cubo, **selecciones):
+    """Celdas del cubo que cumplen la selección ({columna: valores}); None no filtra."""
+    mascara = pd.Series(True, index=cubo.index)
+    for col, valores in selecciones.items():
+        if valores is not None:
+            mascara &= cubo[col].isin(valores)
+    return cubo[mascara]
+
+
+def sumar(cubo, por):
+    """Suma los conteos del cubo agrupando por una o varias dimensiones."""
+    return cubo.groupby(por, observed=True)[COL_TOTAL].sum()
+
+
+def contar(datos, por):
+    """Conteos por una o varias dimensiones, tanto desde registros como desde un cubo."""
+    if COL_TOTAL in datos.columns:
+        return sumar(datos, por)
+    return datos.groupby(por, observed=True).size()
+
+
+def tabla_cruzada(datos, filas, columnas):
+    """Tabla filas × columnas de conteos (equivale a groupby([...]).size().unstack())."""
+    return contar(datos, [filas, columnas]).unstack(fill_value=0)
+
+
+def conteo(datos, dimension, normalize=False):
+    """Conteo por una dimensión ordenado de mayor a menor (equivale a value_counts)."""
+    conteos = contar(datos, dimension)
+    conteos = conteos[conteos > 0].sort_values(ascending=False, kind='stable')
+    if normalize:
+        return (conteos / conteos.sum()).rename('proportion')
+    return conteos.rename('count')
+
+
+def total(cubo, **igualdades):
+    """Número de becas de las celdas que cumplen las igualdades ({columna: valor})."""
+    mascara = pd.Series(True, index=cubo.index)
+    for col, valor in igualdades.items():
+        mascara &= cubo[col] == valor
+    return int(cubo.loc[mascara, COL_TOTAL].sum())
+
+
+def valores_unicos(cubo, dimension):
+    """Valores distintos de una dimensión presentes en la selección."""
+    return cubo.loc[cubo[COL_TOTAL] > 0, dimension].unique()
+
+
+if __name__ == "__main__":
+    # Paso de construcción: sincroniza el almacén, que materializa el cubo de cada año
+    from almacen import cargar_cubo_almacen, sincronizar_almacen
+    from carga_datos import FILE_PATH
+
+    try:
+        manifiesto = sincronizar_almacen(FILE_PATH)
+        cubo = cargar_cubo_almacen(manifiesto, FILE_PATH)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+    else:
+        registros = sum(entrada['filas'] for entrada in manifiesto['particiones'].values())
+        print(f"Cubo materializado: {len(cubo)} celdas a partir de {registros} registros.")
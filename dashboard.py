@@ -1,139 +1,226 @@
+import uuid
+
 import pandas as pd
 import streamlit as st
 
+import instrumentacion
+
+from almacen import (
+    RUTA_CUBO, cargar_cubo_almacen, cargar_cubo_externo, cargar_registros, sincronizar_almacen, version_almacen, version_cubo,
+)
+from carga_datos import normalizar_destino
+from cubo import COL_ANIO, COL_AREA, COL_DEPARTAMENTO, COL_DESTINO, COL_GENERO, COL_REGION
+from exportacion import FORMATOS, exportar
+from graficos import especificacion
+from indicadores import (
+    construir_proyecciones, construir_rankings, indicadores_filtrados, indicadores_globales, proyeccion, sexo_ocde,
+)
+from indice_filtros import IndiceBitmap
+from instrumentacion import etapa, instrumentar_cache
+from proyeccion import ANIO_PROYECCION
+from tabla_detalle import TAMANOS_PAGINA, buscar_texto, ordenar_filas, pagina, total_paginas
+
 st.set_page_config(page_title="Dashboard Equidad" )
 
+FILE_PATH = "Dataframe1.xlsx"
+
+# Límites de la caché: versiones de datos que se mantienen en memoria y
+# combinaciones de filtros memorizadas (se descartan las menos usadas).
+MAX_VERSIONES = 2
+MAX_FILTROS = 128
+
+
 # ----- 1. CARGA DE DATOS -----
-df = pd.read_excel("Dataframe1.xlsx")
+# Los datos se leen del almacén particionado por año: el libro Excel siembra las
+# particiones y las convocatorias nuevas se agregan con `python almacen.py ingerir`.
+# Con EQUIDAD_CUBO=ruta.parquet se sirve un cubo precalculado por bloques: los
+# indicadores salen del cubo y no hay registros para el detalle ni la descarga.
+
+@instrumentar_cache(st.cache_resource(max_entries=MAX_VERSIONES, show_spinner="Cargando datos..."))
+def cargar_datos(version, _manifiesto):
+    """Carga y normaliza los datos una vez por versión; el objeto se comparte entre sesiones."""
+    return normalizar_destino(cargar_registros(_manifiesto, FILE_PATH))
+
+
+@instrumentar_cache(st.cache_resource(max_entries=MAX_VERSIONES, show_spinner=False))
+def cargar_cubo_datos(version, _manifiesto):
+    """Cubo de conteos año × región × departamento × sexo × destino × modalidad × OCDE.
 
-# Normalización básica
-df["Pais de Estudios"] = df["Pais de Estudios"].astype(str).str.strip()
-df["Destino Pais"] = df["Pais de Estudios"].str.title()
+    Se arma uniendo los cubos precalculados de cada partición, sin recontar registros.
+    """
+    if RUTA_CUBO:
+        return cargar_cubo_externo(RUTA_CUBO)
+    return cargar_cubo_almacen(_manifiesto, FILE_PATH)
+
+
+@instrumentar_cache(st.cache_resource(max_entries=MAX_VERSIONES, show_spinner=False))
+def cargar_indice(version, _df):
+    """Índice de mapas de bits para resolver los filtros de la barra lateral."""
+    return IndiceBitmap(_df)
+
+
+@instrumentar_cache(st.cache_resource(max_entries=MAX_VERSIONES, show_spinner=False))
+def cargar_rankings(version, _cubo):
+    """Conteos por partición de destinos y áreas OCDE para top-k y participaciones."""
+    return construir_rankings(_cubo)
+
+
+@instrumentar_cache(st.cache_resource(max_entries=MAX_VERSIONES, show_spinner=False))
+def cargar_proyecciones(version, _cubo):
+    """Parámetros de tendencia de todas las series año a año, ajustados una vez por versión."""
+    return construir_proyecciones(_cubo)
 
 
 # ----- 2. CÁLCULO DE INDICADORES -----
+# La lógica vive en `indicadores.py` (compartida con la API); aquí solo se memoriza.
 
-# Totales globales
-total_hombres = (df["Sexo"] == "Masculino").sum()
-total_mujeres = (df["Sexo"] == "Femenino").sum()
+@instrumentar_cache(st.cache_data(max_entries=MAX_VERSIONES, show_spinner=False))
+def calcular_indicadores_globales(version, _df, _cubo):
+    """Indicadores sobre el total de registros (no dependen de los filtros)."""
+    return indicadores_globales(_cubo, _df)
 
-# Totales por año
-genero_por_ano = df.groupby(["Año de la convocatoria", "Sexo"]).size().unstack(fill_value=0)
 
-# Totales por región
-genero_por_region = df.groupby(["Depto_nacimi", "Sexo"]).size().unstack(fill_value=0)
+@instrumentar_cache(st.cache_data(max_entries=MAX_FILTROS, show_spinner=False))
+def calcular_indicadores_filtrados(version, años, regiones, generos, _cubo, _rankings):
+    """Indicadores que dependen de los filtros, memorizados por combinación de filtros."""
+    return indicadores_filtrados(_cubo, _rankings, años, regiones, generos)
 
-# Totales por destino país
-genero_por_destino = df.groupby(["Pais de Estudios", "Sexo"]).size().unstack(fill_value=0)
 
-# % de participación por país destino
-participacion_por_pais = (df["Pais de Estudios"].value_counts(normalize=True) * 100).round(2)
+@instrumentar_cache(st.cache_data(max_entries=MAX_FILTROS, show_spinner=False))
+def calcular_sexo_ocde(version, años, regiones, generos, top_n, _rankings):
+    """Tabla y pivot Sexo × OCDE para las Top N categorías de la selección."""
+    return sexo_ocde(_rankings, años, regiones, generos, top_n)
 
-# País dominante por región
-pais_por_region = df.groupby("Región de nacimiento")["Pais de Estudios"].agg(lambda x: x.value_counts().idxmax())
 
-# Brecha de equidad por país destino (%)
-equidad_destino_pct = df.groupby("Pais de Estudios")["Sexo"].value_counts(normalize=True).unstack().fillna(0) * 100
-equidad_destino_pct = equidad_destino_pct.round(2)
-if "Masculino" in equidad_destino_pct.columns and "Femenino" in equidad_destino_pct.columns:
-    equidad_destino_pct["Brecha Equidad (|H-M|)"] = (equidad_destino_pct["Masculino"] - equidad_destino_pct["Femenino"]).abs()
-else:
-    equidad_destino_pct["Brecha Equidad (|H-M|)"] = 0
+@instrumentar_cache(st.cache_data(max_entries=MAX_FILTROS, show_spinner=False))
+def calcular_proyeccion(version, regiones, generos, dimension, _proyecciones):
+    """Proyección de la selección: suma de los parámetros ya ajustados, sin reajustar."""
+    return proyeccion(_proyecciones, regiones, generos, dimension)
 
-# Región con mayor movilidad internacional (conteo)
-movilidad_por_region = df.groupby("Región de nacimiento").size().sort_values(ascending=False)
 
-# Diversidad de destinos por año
-diversidad_destinos_ano = df.groupby("Año de la convocatoria")["Pais de Estudios"].nunique()
+@instrumentar_cache(st.cache_data(max_entries=8 * MAX_FILTROS, show_spinner=False))
+def especificacion_grafico(version, clave, grafico, _tabla):
+    """Especificación Vega-Lite de un gráfico, memorizada por versión y clave de filtros."""
+    return especificacion(grafico, _tabla)
 
-# Ranking de destinos por año
-ranking_destino_ano = df.groupby("Año de la convocatoria")["Pais de Estudios"].value_counts().groupby(level=0).head(5)
 
-# Duración promedio por género (si existe el campo "Duracion" en el df)
-if "Duracion" in df.columns:
-   duracion_prom_genero = df.groupby("Sexo")["Duracion"].mean().round(2)
-else:
-    duracion_prom_genero = "No disponible en la matriz"
+def mostrar_grafico(clave, grafico, tabla):
+    """Dibuja un gráfico Altair; la selección y el Top N se resuelven en el navegador."""
+    st.vega_lite_chart(especificacion_grafico(version, clave, grafico, tabla), width="stretch")
 
-# Proyección 2026 (tendencia lineal simple con promedio móvil)
-proyeccion_genero_2026 = df.groupby("Año de la convocatoria")["Sexo"].value_counts().groupby(level=0).apply(lambda x: x).unstack(fill_value=0)
-proyeccion_genero_2026 = proyeccion_genero_2026.mean().round()
+
+@instrumentar_cache(st.cache_data(max_entries=MAX_FILTROS, show_spinner=False))
+def filas_detalle(version, años, regiones, generos, busqueda, columnas, orden, ascendente, _df, _filas):
+    """Ids de los registros filtrados que coinciden con la búsqueda, en el orden pedido."""
+    filas = buscar_texto(_df, _filas, busqueda, columnas)
+    return ordenar_filas(_df, filas, orden, ascendente)
 
 
 # ----- 3. DASHBOARD EN STREAMLIT -----
 
+# Instrumentación (EQUIDAD_INSTRUMENTACION=1): tiempo y memoria por etapa de cada re-ejecución
+registro = instrumentacion.iniciar_rerun(st.session_state.setdefault("id_sesion", uuid.uuid4().hex))
+
 st.set_page_config(layout="wide")
 st.title("📊 Dashboard Avanzado – Financiación Académica")
 
+# Invalidación explícita: la versión cambia sola cuando cambia el libro, y el
+# botón descarta todas las cachés (datos, indicadores y filtros memorizados).
+if st.sidebar.button("🔄 Recargar datos"):
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+with etapa("sincronizar_almacen"):
+    if RUTA_CUBO:
+        manifiesto, version = None, version_cubo(RUTA_CUBO)
+    else:
+        # Serializada entre sesiones con un candado del almacén: un solo hilo escribe las particiones
+        manifiesto = sincronizar_almacen(FILE_PATH)
+        version = version_almacen(manifiesto)
+with etapa("cargar_datos"):
+    df = None if RUTA_CUBO else cargar_datos(version, manifiesto)
+    cubo = cargar_cubo_datos(version, manifiesto)
+    indice = None if df is None else cargar_indice(version, df)
+    rankings = cargar_rankings(version, cubo)
+    proyecciones = cargar_proyecciones(version, cubo)
+with etapa("indicadores_globales"):
+    indicadores = calcular_indicadores_globales(version, df, cubo)
+
+pais_por_region = indicadores["pais_por_region"]
+movilidad_por_region = indicadores["movilidad_por_region"]
+equidad_destino_pct = indicadores["equidad_destino_pct"]
+genero_por_ano = indicadores["genero_por_ano"]
+
 # --- FILTROS ---
 st.sidebar.header("🔎 Filtros")
-años = st.sidebar.multiselect("Año", options=sorted(df["Año de la convocatoria"].unique()), default=sorted(df["Año de la convocatoria"].unique()))
-regiones = st.sidebar.multiselect("Región", options=sorted(df["Región de nacimiento"].unique()), default=sorted(df["Región de nacimiento"].unique()))
-generos = st.sidebar.multiselect("Género", options=sorted(df["Sexo"].unique()), default=sorted(df["Sexo"].unique()))
+años = st.sidebar.multiselect("Año", options=indicadores["opciones_anos"], default=indicadores["opciones_anos"])
+regiones = st.sidebar.multiselect("Región", options=indicadores["opciones_regiones"], default=indicadores["opciones_regiones"])
+generos = st.sidebar.multiselect("Género", options=indicadores["opciones_generos"], default=indicadores["opciones_generos"])
 
-df_filtrado = df[df["Año de la convocatoria"].isin(años) & df["Región de nacimiento"].isin(regiones) & df["Sexo"].isin(generos)]
+# Las selecciones se ordenan para que la misma combinación comparta entrada de caché
+filtros = (tuple(sorted(años)), tuple(sorted(regiones)), tuple(sorted(generos)))
+with etapa("indicadores_filtrados"):
+    filtrados = calcular_indicadores_filtrados(version, *filtros, cubo, rankings)
+
+# Ids de los registros seleccionados (OR dentro de cada filtro, AND entre filtros)
+with etapa("seleccion_registros"):
+    filas_filtradas = None if indice is None else indice.seleccionar(**{COL_ANIO: años, COL_REGION: regiones, COL_GENERO: generos})
 
 # ---- TARJETAS PRINCIPALES ----
 st.subheader("👥 Indicadores Globales")
-c1, c2, c3, c4 = st.columns(4)
-c1.metric("Total financiados", len(df_filtrado))
-c2.metric("Total hombres", (df_filtrado["Sexo"] == "Masculino").sum())
-c3.metric("Total mujeres", (df_filtrado["Sexo"] == "Femenino").sum())
-c4.metric("Destinos únicos", df_filtrado["Pais de Estudios"].nunique())
+with etapa("tarjetas"):
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Total financiados", filtrados["total"])
+    c2.metric("Total hombres", filtrados["total_hombres"])
+    c3.metric("Total mujeres", filtrados["total_mujeres"])
+    c4.metric("Destinos únicos", filtrados["destinos_unicos"])
 
 # ---- SECCIÓN DE DATOS FILTRADOS ----
-st.subheader("📍 País dominante de estudio por región")
-st.dataframe(pais_por_region.loc[regiones])
+with etapa("tablas_resumen"):
+    st.subheader("📍 País dominante de estudio por región")
+    st.dataframe(pais_por_region.loc[regiones])
 
-st.subheader("🌍 Movilidad internacional por región")
-st.dataframe(movilidad_por_region.loc[regiones])
+    st.subheader("🌍 Movilidad internacional por región")
+    st.dataframe(movilidad_por_region.loc[regiones])
 
-st.subheader("⚖️ Brecha de Equidad por País Destino (%)")
-st.dataframe(equidad_destino_pct.loc[df_filtrado["Pais de Estudios"].unique()])
+    st.subheader("⚖️ Brecha de Equidad por País Destino (%)")
+    st.dataframe(equidad_destino_pct.loc[filtrados["destinos"]])
 
-st.subheader("📈 Hombres vs Mujeres por Año")
-st.dataframe(genero_por_ano.loc[años])
+    st.subheader("📈 Hombres vs Mujeres por Año")
+    st.dataframe(genero_por_ano.loc[años])
 
-#st.subheader("🏢 Hombres vs Mujeres por Región")
-#st.dataframe(genero_por_region.loc[regiones])
+    #st.subheader("🏢 Hombres vs Mujeres por Región")
+    #st.dataframe(genero_por_region.loc[regiones])
 
-st.subheader("🎯 % Participación por país destino (todos financiados)")
-st.dataframe((df_filtrado["Pais de Estudios"].value_counts(normalize=True) * 100).round(2))
+    st.subheader("🎯 % Participación por país destino (todos financiados)")
+    st.dataframe(filtrados["participacion_por_pais"])
 
-st.subheader("🔥 Ranking Top 5 países destino del período filtrado")
-top5 = df_filtrado["Pais de Estudios"].value_counts().head(5)
-st.dataframe(top5)
+    st.subheader("🔥 Ranking Top 5 países destino del período filtrado")
+    st.dataframe(filtrados["top5"])
 
 # --- GRÁFICOS ---
 st.subheader("📊 Visualizaciones")
 
-# Gráfico H vs M global
-st.write("### Total Hombres vs Total Mujeres")
-genero_global = df_filtrado["Sexo"].value_counts()
-st.bar_chart(genero_global)
-
-# H vs M por año
-st.write("### Total Hombres vs Mujeres por Año")
-genero_ano_graf = df_filtrado.groupby(["Año de la convocatoria", "Sexo"]).size().unstack(fill_value=0)
-st.bar_chart(genero_ano_graf)
+with etapa("graficos"):
+    # Gráfico H vs M global
+    st.write("### Total Hombres vs Total Mujeres")
+    mostrar_grafico(("genero_global", *filtros), "barras", filtrados["genero_global"])
 
-# H vs M por región
-st.write("### Total Hombres vs Mujeres por Región")
-genero_region_graf = df_filtrado.groupby(["Depto_nacimi", "Sexo"]).size().unstack(fill_value=0)
-st.bar_chart(genero_region_graf)
+    # H vs M por año
+    st.write("### Total Hombres vs Mujeres por Año")
+    mostrar_grafico(("genero_por_ano", *filtros), "lineas_por_serie", filtrados["genero_por_ano"])
 
-# Mujeres vs hombres por destino
-st.write("### Mujeres vs Hombres por País Destino")
-destino_region_graf = df_filtrado.groupby(["Pais de Estudios", "Sexo"]).size().unstack(fill_value=0)
-st.bar_chart(destino_region_graf)
+    # H vs M por región
+    st.write("### Total Hombres vs Mujeres por Región")
+    mostrar_grafico(("genero_por_region", *filtros), "barras_por_serie", filtrados["genero_por_region"])
 
-# Movilidad por región (orden)
-st.write("### Región con mayor movilidad")
-st.bar_chart(movilidad_por_region.loc[regiones])
+    # Mujeres vs hombres por destino
+    st.write("### Mujeres vs Hombres por País Destino")
+    mostrar_grafico(("genero_por_destino", *filtros), "barras_por_serie", filtrados["genero_por_destino"])
 
-# Proyección 2026
-st.write("### 🔮 Proyección 2026 – promedio lineal por género")
-st.write(proyeccion_genero_2026)
+    # Movilidad por región (orden)
+    st.write("### Región con mayor movilidad")
+    mostrar_grafico(("movilidad_por_region", filtros[1]), "barras", movilidad_por_region.loc[regiones])
 
 # ---------------------------------------------
 # NUEVOS GRÁFICOS SOLICITADOS
@@ -142,13 +229,12 @@ st.write(proyeccion_genero_2026)
 
 st.write("### 🚻 Selección de Sexo por Modalidad")
 
-# Validación de columnas
-if all(col in df_filtrado.columns for col in ["Modalidad", "Sexo"]):
-    sexo_modalidad = df_filtrado.groupby(["Modalidad", "Sexo"]).size().unstack(fill_value=0)
-
-    st.bar_chart(sexo_modalidad)
-else:
-    st.warning("⚠️ El dataframe no contiene las columnas 'Modalidad' y 'Sexo'. Verifica los nombres.")
+with etapa("sexo_modalidad"):
+    # Validación de columnas
+    if "sexo_modalidad" in filtrados:
+        mostrar_grafico(("sexo_modalidad", *filtros), "barras_por_serie", filtrados["sexo_modalidad"])
+    else:
+        st.warning("⚠️ El dataframe no contiene las columnas 'Modalidad' y 'Sexo'. Verifica los nombres.")
 
 # ---------------------------------------------
 # TABLA Y GRÁFICA: SEXO POR OCDE (INTERACTIVO)
@@ -156,58 +242,92 @@ else:
 
 st.write("### 🎓 Distribución de Sexo por OCDE (Top N Interactivo)")
 
-# Validación de columnas
-if all(col in df_filtrado.columns for col in ["OCDE", "Sexo"]):
+with etapa("sexo_ocde"):
+    # Validación de columnas
+    if "conteo_ocde" in filtrados:
 
-    # Selector Top N
-    top_n = st.selectbox(
-        "Seleccionar Top N categorías OCDE",
-        [5, 10, 20, 30, "Todos"],
-        index=1
-    )
+        # Selector Top N
+        top_n = st.selectbox(
+            "Seleccionar Top N categorías OCDE",
+            [5, 10, 20, 30, "Todos"],
+            index=1
+        )
+
+        tabla_sexo_ocde, pivot_ocde = calcular_sexo_ocde(version, *filtros, top_n, rankings)
 
-    # Conteo total por OCDE para determinar los más frecuentes
-    conteo_ocde = df_filtrado["OCDE"].value_counts()
+        st.write("#### 📋 Tabla Sexo por OCDE (ordenada por OCDE → Sexo)")
+        st.dataframe(tabla_sexo_ocde, width="stretch")
+
+        st.write("#### 📊 Gráfica Sexo vs OCDE (Top N)")
+        mostrar_grafico(("sexo_ocde", *filtros, top_n), "barras_por_serie", pivot_ocde)
 
-    # Filtrar por Top N
-    if top_n == "Todos":
-        ocde_seleccionadas = conteo_ocde.index.tolist()
     else:
-        ocde_seleccionadas = conteo_ocde.head(top_n).index.tolist()
+        st.warning("⚠️ El dataframe no contiene las columnas 'OCDE' y 'Sexo'. Verifica los nombres.")
 
-    df_ocde_top = df_filtrado[df_filtrado["OCDE"].isin(ocde_seleccionadas)]
+# ---------------------------------------------
+# PROYECCIÓN
+# ---------------------------------------------
 
-    # Tabla Sexo vs OCDE
-    tabla_sexo_ocde = (
-        df_ocde_top.groupby(["OCDE", "Sexo"])
-        .size()
-        .reset_index(name="Total")
-        .sort_values(["OCDE", "Sexo"])
-    )
+st.write(f"### 🔮 Proyección {ANIO_PROYECCION}")
 
-    st.write("#### 📋 Tabla Sexo por OCDE (ordenada por OCDE → Sexo)")
-    st.dataframe(tabla_sexo_ocde, use_container_width=True)
+with etapa("proyeccion"):
+    dimensiones_proyeccion = {
+        "Género": COL_GENERO, "Departamento": COL_DEPARTAMENTO, "Área OCDE": COL_AREA, "País destino": COL_DESTINO,
+    }
+    nombre_dimension = st.selectbox("Proyectar por", list(dimensiones_proyeccion))
+    tabla_proyeccion = calcular_proyeccion(version, *filtros[1:], dimensiones_proyeccion[nombre_dimension], proyecciones)
 
-    # Pivot para la gráfica
-    pivot_ocde = (
-        df_ocde_top.groupby(["OCDE", "Sexo"]).size().unstack(fill_value=0)
+    st.caption(
+        "Tendencias ajustadas sobre todos los años de la región y el género seleccionados "
+        "(el filtro de año no aplica a la proyección)."
+    )
+    st.dataframe(tabla_proyeccion, width="stretch")
+    mostrar_grafico(
+        ("proyeccion", *filtros[1:], nombre_dimension), "barras_agrupadas", tabla_proyeccion.rename_axis(columns="Modelo")
     )
 
-    st.write("#### 📊 Gráfica Sexo vs OCDE (Top N)")
-    st.bar_chart(pivot_ocde)
 
+st.subheader("📄 Detalle de registros financiados filtrados")
+if df is None:
+    st.info("El dashboard sirve un cubo precalculado (EQUIDAD_CUBO): el detalle y la descarga de registros no están disponibles.")
 else:
-    st.warning("⚠️ El dataframe no contiene las columnas 'OCDE' y 'Sexo'. Verifica los nombres.")
-
+    # Registros de detalle (solo se materializa la página visible de la selección)
+    with etapa("detalle_registros"):
+        columnas_detalle = st.multiselect("Columnas", list(df.columns), default=list(df.columns))
+        d1, d2, d3, d4 = st.columns([3, 2, 1, 1])
+        busqueda = d1.text_input("Buscar texto en las columnas visibles").strip()
+        orden = d2.selectbox("Ordenar por", [None] + columnas_detalle, format_func=lambda c: "(orden original)" if c is None else c)
+        ascendente = d3.radio("Sentido", ["Asc.", "Desc."], horizontal=True) == "Asc."
+        tamano_pagina = d4.selectbox("Filas por página", TAMANOS_PAGINA, index=1)
+
+        # Búsqueda y orden se resuelven sobre ids (memorizados); al navegador solo va la página visible
+        seleccion_detalle = filas_detalle(
+            version, *filtros, busqueda.casefold(), tuple(columnas_detalle), orden, ascendente, df, filas_filtradas
+        )
+        n_paginas = total_paginas(len(seleccion_detalle), tamano_pagina)
+        numero_pagina = st.number_input(
+            f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, value=1,
+            key=f"pagina_{len(seleccion_detalle)}_{tamano_pagina}",
+        )
+        st.caption(f"{len(seleccion_detalle)} registros coinciden · mostrando página {numero_pagina} de {n_paginas}")
+        st.dataframe(pagina(df, seleccion_detalle, columnas_detalle, numero_pagina, tamano_pagina), width="stretch")
+
+    # Exportar datos: el archivo se genera por bloques solo cuando se pulsa el botón
+    formato_exportacion = st.selectbox("Formato de descarga", list(FORMATOS))
+    extension, mime = FORMATOS[formato_exportacion]
+    st.download_button(
+        label=f"📥 Descargar datos filtrados en {formato_exportacion}",
+        data=lambda: exportar(df, filas_filtradas, formato_exportacion),
+        file_name=f"financiados_filtrados{extension}",
+        mime=mime,
+        on_click="ignore",
+    )
 
-# Registros de detalle
-st.subheader("📄 Detalle de registros financiados filtrados")
-st.dataframe(df_filtrado)
-
-# Exportar datos
-st.download_button(
-    label="📥 Descargar datos filtrados en CSV",
-    data=df_filtrado.to_csv(index=False),
-    file_name="financiados_filtrados.csv",
-    mime="text/csv"
-)
+# Panel de administración: mediciones de esta re-ejecución (también quedan en el log JSON)
+if registro is not None:
+    resumen = instrumentacion.finalizar_rerun()
+    with st.sidebar.expander("⏱️ Instrumentación (admin)"):
+        st.write(f"Re-ejecución: {resumen['segundos']:.3f} s · memoria {resumen['memoria_mb']} MB")
+        st.dataframe(pd.DataFrame(resumen["etapas"]).set_index("etapa"))
+        st.write("Cachés (llamadas / aciertos / fallos)")
+        st.dataframe(pd.DataFrame.from_dict(resumen["caches"], orient="index"))
@@ -0,0 +1,98 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from carga_datos import FILE_PATH, SHEET_NAME, cargar_dataframe
+from procesamiento_bloques import FILAS_POR_BLOQUE
+
+# Bloques de columnas que se muestrean juntos para conservar la coherencia entre
+# ellas (p. ej. un departamento pertenece a su región; un programa a su área OCDE).
+# Cada bloque se remuestrea por separado con la distribución empírica del libro,
+# así que las frecuencias por valor y las combinaciones dentro del bloque coinciden.
+BLOQUES = [
+    ['Año de la convocatoria'],
+    ['Modalidad'],
+    ['Sexo'],
+    ['Ambito', 'Pais de nacimiento', 'Región de nacimiento', 'Depto_nacimi', 'COD_DANE_NACIMIENTO'],
+    ['Pais de Estudios', 'Nombre de la Ins.de estudios', 'Nombre de la Ins.de estudios Español', 'NIT Institución estudios'],
+    ['Programa de estudios', 'Programa Minciencias', 'OCDE'],
+]
+
+
+def generar_registros(n_filas, base=None, semilla=0):
+    """Genera `n_filas` registros sintéticos con el esquema y las distribuciones del libro de muestra."""
+    if base is None:
+        base = cargar_dataframe(FILE_PATH, SHEET_NAME)
+    generador = np.random.default_rng(semilla)
+
+    columnas = {}
+    for bloque in BLOQUES:
+        presentes = [col for col in bloque if col in base.columns]
+        if not presentes:
+            continue
+        filas = generador.integers(0, len(base), size=n_filas)
+        for col in presentes:
+            columnas[col] = base[col].to_numpy()[filas]
+
+    # Columnas no cubiertas por ningún bloque se remuestrean de forma independiente
+    for col in base.columns:
+        if col not in columnas:
+            columnas[col] = base[col].to_numpy()[generador.integers(0, len(base), size=n_filas)]
+
+    df = pd.DataFrame(columnas)[list(base.columns)]
+    for col in base.columns:
+        df[col] = df[col].astype(base[col].dtype)
+    return df
+
+
+def generar_escala(escala, base=None, semilla=0):
+    """Registros sintéticos equivalentes a `escala` veces el libro de muestra (en memoria)."""
+    if base is None:
+        base = cargar_dataframe(FILE_PATH, SHEET_NAME)
+    return generar_registros(int(escala * len(base)), base=base, semilla=semilla)
+
+
+def generar_bloques(n_filas, base, semilla=0, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Genera `n_filas` registros sintéticos en bloques; cada bloque usa su propia semilla derivada."""
+    for numero, inicio in enumerate(range(0, n_filas, filas_por_bloque)):
+        yield generar_registros(min(filas_por_bloque, n_filas - inicio), base=base, semilla=[semilla, numero])
+
+
+def escribir_escala(escala, salida, base=None, semilla=0, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Escribe en `salida` (.parquet o .csv) `escala` veces el libro de muestra, bloque a bloque.
+
+    La memoria pico queda acotada por `filas_por_bloque`, no por la escala, y el archivo
+    se puede leer luego por bloques (p. ej. `generar_reportes.py --por-bloques`).
+    """
+    if base is None:
+        base = cargar_dataframe(FILE_PATH, SHEET_NAME)
+    n_filas = int(escala * len(base))
+    bloques = generar_bloques(n_filas, base, semilla, filas_por_bloque)
+
+    if salida.endswith('.csv'):
+        for numero, bloque in enumerate(bloques):
+            bloque.to_csv(salida, index=False, mode='w' if numero == 0 else 'a', header=numero == 0)
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # El esquema sale del libro completo: un bloque con una columna toda nula no lo altera
+        esquema = pa.Schema.from_pandas(base, preserve_index=False)
+        with pq.ParquetWriter(salida, esquema) as escritor:
+            for bloque in bloques:
+                escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+    return n_filas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera registros sintéticos con el esquema del libro de muestra.")
+    parser.add_argument('escala', type=float, help="Múltiplo del tamaño de la muestra (p. ej. 10, 100, 1000).")
+    parser.add_argument('salida', help="Archivo de salida (.parquet o .csv).")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE,
+                        help="Registros generados y escritos por bloque (acota la memoria).")
+    args = parser.parse_args()
+
+    n_filas = escribir_escala(args.escala, args.salida, semilla=args.semilla, filas_por_bloque=args.filas_por_bloque)
+    print(f"{n_filas} registros sintéticos escritos en '{args.salida}'.")
@@ -0,0 +1,83 @@
+import io
+import zlib
+
+# Formatos de exportación: nombre visible -> (extensión, tipo MIME)
+FORMATOS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV comprimido (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# Registros que se serializan por bloque: limita la memoria pico de la exportación
+FILAS_POR_BLOQUE = 10_000
+
+
+class FlujoBloques(io.RawIOBase):
+    """Archivo de solo lectura que produce su contenido bajo demanda desde un iterador de bytes."""
+
+    def __init__(self, bloques):
+        self._bloques = iter(bloques)
+        self._pendiente = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        while not self._pendiente:
+            try:
+                self._pendiente = next(self._bloques)
+            except StopIteration:
+                return 0
+        n = min(len(destino), len(self._pendiente))
+        destino[:n] = self._pendiente[:n]
+        self._pendiente = self._pendiente[n:]
+        return n
+
+
+def _rebanadas(df, filas, filas_por_bloque):
+    """Recorre la selección de filas por bloques, materializando solo un bloque a la vez."""
+    for inicio in range(0, len(filas), filas_por_bloque):
+        yield df.take(filas[inicio:inicio + filas_por_bloque])
+
+
+def bloques_csv(df, filas, filas_por_bloque=FILAS_POR_BLOQUE):
+    """CSV en bloques de bytes: primero la cabecera y luego cada bloque de registros."""
+    yield df.head(0).to_csv(index=False).encode('utf-8')
+    for bloque in _rebanadas(df, filas, filas_por_bloque):
+        yield bloque.to_csv(index=False, header=False).encode('utf-8')
+
+
+def bloques_gzip(bloques):
+    """Comprime en gzip un iterador de bloques de bytes sin reunirlos en memoria."""
+    compresor = zlib.compressobj(wbits=31)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def parquet(df, filas, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Parquet escrito por grupos de filas (un grupo por bloque de registros)."""
+    # pyarrow se importa solo al exportar a Parquet, no al arrancar el dashboard
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    salida = io.BytesIO()
+    esquema = pa.Schema.from_pandas(df.head(0), preserve_index=False)
+    with pq.ParquetWriter(salida, esquema) as escritor:
+        for bloque in _rebanadas(df, filas, filas_por_bloque):
+            escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+    salida.seek(0)
+    return salida
+
+
+def exportar(df, filas, formato):
+    """Archivo (tipo file) con los registros seleccionados en el formato pedido."""
+    if formato == "CSV":
+        return io.BufferedReader(FlujoBloques(bloques_csv(df, filas)))
+    if formato == "CSV comprimido (gzip)":
+        return io.BufferedReader(FlujoBloques(bloques_gzip(bloques_csv(df, filas))))
+    if formato == "Parquet":
+        return parquet(df, filas)
+    raise ValueError(f"Formato de exportación desconocido: {formato}")
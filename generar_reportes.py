@@ -0,0 +1,104 @@
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import analisis_descriptivo_equidad_anual as anual
+import analisis_descriptivo_equidad_final_v4 as descriptivo
+import cache_figuras
+from procesamiento_bloques import FILAS_POR_BLOQUE
+
+# Backend sin interfaz gráfica para cuando se importe pyplot (al dibujar el primer gráfico);
+# la variable de entorno la heredan los procesos trabajadores. Se asigna siempre: un
+# MPLBACKEND interactivo heredado de la sesión (p. ej. TkAgg) fallaría en los trabajadores
+os.environ['MPLBACKEND'] = 'Agg'
+
+# Análisis que componen el reporte completo: (módulo, función)
+ANALISIS = [
+    (descriptivo, descriptivo.analisis_descriptivo_genero),
+    (descriptivo, descriptivo.analisis_descriptivo_regional),
+    (descriptivo, descriptivo.analisis_brecha_genero_area),
+    (anual, anual.analisis_temporal_genero),
+    (anual, anual.analisis_temporal_regional),
+    (anual, anual.analisis_temporal_area),
+]
+
+# Datos del proceso trabajador (se reciben una sola vez al iniciar cada proceso)
+_df_trabajador = None
+
+
+def _iniciar_trabajador(df, directorio_salida, graficos=True):
+    """Guarda los datos limpios en el proceso y fija el directorio donde se escriben los PNG."""
+    global _df_trabajador
+    _df_trabajador = df
+    cache_figuras.GRAFICOS_ACTIVOS = graficos
+    os.chdir(directorio_salida)
+
+
+def _ejecutar_analisis(indice):
+    """Ejecuta un análisis capturando su salida de texto; devuelve (nombre, texto, segundos)."""
+    _, funcion = ANALISIS[indice]
+    salida = io.StringIO()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(salida):
+        funcion(_df_trabajador)
+    return funcion.__name__, salida.getvalue(), time.perf_counter() - inicio
+
+
+def generar_reportes(directorio_salida='.', procesos=None, por_bloques=None, filas_por_bloque=FILAS_POR_BLOQUE,
+                     graficos=True):
+    """Carga y limpia los datos una vez y reparte los análisis en un pool de procesos.
+
+    Con `por_bloques` (ruta de un extracto grande) los análisis reciben el cubo de conteos;
+    con `graficos=False` solo se escriben los reportes de texto.
+    """
+    # La limpieza del análisis anual incluye la del descriptivo y además valida el año
+    if por_bloques:
+        df = anual.cargar_y_limpiar_por_bloques(por_bloques, filas_por_bloque)
+    else:
+        df = anual.cargar_y_limpiar_datos(anual.FILE_PATH, anual.SHEET_NAME)
+    if df is None:
+        return None
+
+    directorio_salida = Path(directorio_salida).resolve()
+    directorio_reportes = directorio_salida / 'reportes'
+    directorio_reportes.mkdir(parents=True, exist_ok=True)
+
+    procesos = procesos or min(len(ANALISIS), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                             initargs=(df, directorio_salida, graficos)) as pool:
+        resultados = list(pool.map(_ejecutar_analisis, range(len(ANALISIS))))
+
+    # Reportes de texto: uno por análisis y uno consolidado, en el orden original
+    consolidado = []
+    for nombre, texto, segundos in resultados:
+        (directorio_reportes / f"{nombre}.txt").write_text(texto, encoding='utf-8')
+        consolidado.append(texto)
+        print(f"{nombre}: {segundos:.2f} s")
+    (directorio_reportes / 'reporte_completo.txt').write_text(''.join(consolidado), encoding='utf-8')
+
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera en paralelo todos los reportes y gráficos de equidad.")
+    parser.add_argument('--salida', default='.', help="Directorio donde se escriben los PNG y la carpeta 'reportes'.")
+    parser.add_argument('--procesos', type=int, default=None, help="Número de procesos (por defecto uno por análisis).")
+    parser.add_argument('--por-bloques', metavar='RUTA', default=None,
+                        help="Procesa por bloques un extracto grande (.parquet, .csv o .xlsx) en lugar del libro.")
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE)
+    parser.add_argument('--sin-graficos', action='store_true',
+                        help="Solo reportes de texto: no genera PNG ni importa matplotlib/seaborn.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    graficos = not args.sin_graficos
+    if generar_reportes(args.salida, args.procesos, args.por_bloques, args.filas_por_bloque, graficos) is not None:
+        print(f"\n--- Reporte completo generado en {time.perf_counter() - inicio:.2f} s ---")
+        if graficos:
+            print(f"Textos en '{Path(args.salida) / 'reportes'}'; gráficos PNG en '{args.salida}'.")
+        else:
+            print(f"Textos en '{Path(args.salida) / 'reportes'}' (modo sin gráficos).")
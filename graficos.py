@@ -0,0 +1,115 @@
+import altair as alt
+import pandas as pd
+
+from cubo import COL_ANIO, COL_TOTAL
+
+# Especificaciones Vega-Lite (Altair) de los gráficos del dashboard, armadas a partir
+# de las tablas ya agregadas en formato largo (categoría, serie, total) y sin celdas en
+# cero. La selección por leyenda y el control de Top N se resuelven en el navegador:
+# interactuar con un gráfico no vuelve a ejecutar el script de Python.
+
+# Con más categorías que esto las barras se dibujan horizontales y con control de Top N
+MAX_CATEGORIAS_VERTICAL = 15
+TOP_N_INICIAL = 15
+
+COL_SERIE = 'Serie'
+
+
+def tabla_larga(tabla, valor=COL_TOTAL):
+    """Tabla categoría × serie (o serie por categoría) en formato largo, sin ceros y con etiquetas de texto."""
+    if isinstance(tabla, pd.Series):
+        tabla = tabla.to_frame(valor)
+    categoria = tabla.index.name or 'Categoria'
+    serie = tabla.columns.name or COL_SERIE
+    largo = tabla.rename_axis(index=categoria, columns=serie).stack().rename(valor).reset_index()
+    largo = largo[largo[valor] != 0]
+    for col in [categoria, serie]:
+        if col != COL_ANIO:
+            largo[col] = largo[col].astype(str)
+    return largo, categoria, serie
+
+
+def _tooltip(categoria, serie, valor):
+    return [alt.Tooltip(categoria), alt.Tooltip(serie), alt.Tooltip(valor, format=',')]
+
+
+def barras(serie, valor=COL_TOTAL):
+    """Barras de una serie por categoría, ordenadas de mayor a menor."""
+    largo, categoria, _ = tabla_larga(serie, valor)
+    return alt.Chart(largo).mark_bar().encode(
+        x=alt.X(f'{categoria}:N', sort='-y', title=None),
+        y=alt.Y(f'{valor}:Q', title=valor),
+        tooltip=[alt.Tooltip(categoria), alt.Tooltip(valor, format=',')],
+    )
+
+
+def lineas_por_serie(tabla, valor=COL_TOTAL):
+    """Una línea por serie (p. ej. género) a lo largo de la categoría (p. ej. año); la leyenda resalta."""
+    largo, categoria, serie = tabla_larga(tabla, valor)
+    seleccion = alt.selection_point(name='serie', fields=[serie], bind='legend')
+    return alt.Chart(largo).mark_line(point=True).encode(
+        x=alt.X(f'{categoria}:O', title=categoria),
+        y=alt.Y(f'{valor}:Q', title=valor),
+        color=alt.Color(f'{serie}:N'),
+        opacity=alt.condition(seleccion, alt.value(1), alt.value(0.15)),
+        tooltip=_tooltip(categoria, serie, valor),
+    ).add_params(seleccion)
+
+
+def barras_por_serie(tabla, valor=COL_TOTAL, apiladas=True):
+    """Barras categoría × serie; la leyenda resalta una serie y, con muchas categorías, un control elige el Top N.
+
+    El Top N se calcula en el navegador (rango por total de la categoría), así que
+    moverlo no vuelve a ejecutar el dashboard ni reenvía datos.
+    """
+    largo, categoria, serie = tabla_larga(tabla, valor)
+    seleccion = alt.selection_point(name='serie', fields=[serie], bind='legend')
+    opacidad = alt.condition(seleccion, alt.value(1), alt.value(0.2))
+    n_categorias = largo[categoria].nunique()
+    orden = alt.EncodingSortField(field=valor, op='sum', order='descending')
+
+    grafico = alt.Chart(largo)
+    if n_categorias <= MAX_CATEGORIAS_VERTICAL:
+        desplazamiento = {} if apiladas else {'xOffset': alt.XOffset(f'{serie}:N')}
+        return grafico.mark_bar().encode(
+            x=alt.X(f'{categoria}:N', sort=orden, title=None),
+            y=alt.Y(f'{valor}:Q', title=valor, stack=apiladas or None),
+            color=alt.Color(f'{serie}:N'),
+            opacity=opacidad,
+            tooltip=_tooltip(categoria, serie, valor),
+            **desplazamiento,
+        ).add_params(seleccion)
+
+    top_n = alt.param(
+        name='top_n', value=min(TOP_N_INICIAL, n_categorias),
+        bind=alt.binding_range(min=1, max=n_categorias, step=1, name='Top N '),
+    )
+    desplazamiento = {} if apiladas else {'yOffset': alt.YOffset(f'{serie}:N')}
+    return grafico.transform_joinaggregate(
+        total_categoria=f'sum({valor})', groupby=[categoria],
+    ).transform_window(
+        puesto='dense_rank()', sort=[alt.SortField('total_categoria', order='descending')],
+    ).transform_filter(
+        alt.datum.puesto <= top_n
+    ).mark_bar().encode(
+        y=alt.Y(f'{categoria}:N', sort=orden, title=None),
+        x=alt.X(f'{valor}:Q', title=valor, stack=apiladas or None),
+        color=alt.Color(f'{serie}:N'),
+        opacity=opacidad,
+        tooltip=_tooltip(categoria, serie, valor),
+        **desplazamiento,
+    ).add_params(seleccion, top_n)
+
+
+# Gráficos del dashboard: nombre -> función que arma el gráfico desde la tabla agregada
+GRAFICOS = {
+    'barras': barras,
+    'lineas_por_serie': lineas_por_serie,
+    'barras_por_serie': barras_por_serie,
+    'barras_agrupadas': lambda tabla: barras_por_serie(tabla, apiladas=False),
+}
+
+
+def especificacion(grafico, tabla):
+    """Especificación Vega-Lite (dict, con los datos incluidos) del gráfico `grafico` sobre `tabla`."""
+    return GRAFICOS[grafico](tabla).properties(width='container').to_dict()
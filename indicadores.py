@@ -0,0 +1,125 @@
+from agregaciones import ConteosParticionados, calcular_indicadores_cubo
+from cubo import COL_ANIO, COL_AREA, COL_DESTINO, COL_GENERO, COL_MODALIDAD, COL_REGION, filtrar_cubo
+from normalizacion import GENERO_HOMBRE, GENERO_MUJER
+from proyeccion import ANIO_PROYECCION, Proyecciones
+
+# Indicadores de equidad del dashboard, sin dependencias de Streamlit: los usan
+# tanto el dashboard (con sus cachés) como la API HTTP de indicadores.
+# Todos los conteos se responden sumando celdas del cubo, no recorriendo registros.
+
+
+def construir_rankings(cubo):
+    """Conteos por partición (año × región × género) de destinos y áreas OCDE.
+
+    Los top-k, las participaciones y los cruces con género de la selección se
+    obtienen sumando las particiones elegidas, sin recorrer el cubo.
+    """
+    dimensiones = [col for col in [COL_DESTINO, COL_AREA] if col in cubo.columns]
+    return {col: ConteosParticionados(cubo, col) for col in dimensiones}
+
+
+def indicadores_globales(cubo, df=None):
+    """Indicadores sobre el total de registros (no dependen de los filtros)."""
+    # Una sola llamada al motor de agregación calcula todas las tablas base
+    ind = calcular_indicadores_cubo(cubo, [
+        "genero_por_ano", "genero_por_region", "genero_por_destino", "participacion_por_pais",
+        "pais_por_region", "movilidad_por_region", "diversidad_destinos_ano", "ranking_destino_ano",
+        "genero_global",
+    ])
+
+    # Opciones de los filtros
+    ind["opciones_anos"] = sorted(ind["genero_por_ano"].index)
+    ind["opciones_regiones"] = sorted(ind["movilidad_por_region"].index)
+    ind["opciones_generos"] = sorted(ind["genero_global"].index)
+
+    # Totales globales
+    ind["total_hombres"] = ind["genero_global"].get(GENERO_HOMBRE, 0)
+    ind["total_mujeres"] = ind["genero_global"].get(GENERO_MUJER, 0)
+
+    # % de participación por país destino
+    ind["participacion_por_pais"] = (ind["participacion_por_pais"] * 100).round(2)
+
+    # Brecha de equidad por país destino (%)
+    genero_por_destino = ind["genero_por_destino"]
+    equidad_destino_pct = genero_por_destino.div(genero_por_destino.sum(axis=1), axis=0) * 100
+    equidad_destino_pct = equidad_destino_pct.round(2)
+    if GENERO_HOMBRE in equidad_destino_pct.columns and GENERO_MUJER in equidad_destino_pct.columns:
+        equidad_destino_pct["Brecha Equidad (|H-M|)"] = (equidad_destino_pct[GENERO_HOMBRE] - equidad_destino_pct[GENERO_MUJER]).abs()
+    else:
+        equidad_destino_pct["Brecha Equidad (|H-M|)"] = 0
+    ind["equidad_destino_pct"] = equidad_destino_pct
+
+    # Duración promedio por género (si existe el campo "Duracion" en los registros)
+    if df is not None and "Duracion" in df.columns:
+        ind["duracion_prom_genero"] = df.groupby("Sexo")["Duracion"].mean().round(2)
+    else:
+        ind["duracion_prom_genero"] = "No disponible en la matriz"
+
+    return ind
+
+
+def filtrar_seleccion(cubo, años, regiones, generos):
+    """Celdas del cubo que cumplen la selección de la barra lateral."""
+    return filtrar_cubo(cubo, **{COL_ANIO: años, COL_REGION: regiones, COL_GENERO: generos})
+
+
+def indicadores_filtrados(cubo, rankings, años, regiones, generos):
+    """Indicadores que dependen de los filtros (año, región y género)."""
+    seleccion = filtrar_seleccion(cubo, años, regiones, generos)
+    solicitados = ["genero_global", "genero_por_ano", "genero_por_region"]
+
+    # Validación de columnas: Modalidad solo si está en los datos
+    if all(col in seleccion.columns for col in [COL_MODALIDAD, COL_GENERO]):
+        solicitados.append("sexo_modalidad")
+
+    ind = calcular_indicadores_cubo(seleccion, solicitados)
+
+    # Destinos y OCDE: fusión de los conteos por partición de la selección
+    particiones = {COL_ANIO: años, COL_REGION: regiones, COL_GENERO: generos}
+    destinos = rankings[COL_DESTINO]
+    ind["conteo_destino"] = destinos.top_k(**particiones)
+    ind["participacion_por_pais"] = destinos.participacion(**particiones)
+    ind["genero_por_destino"] = destinos.tabla(COL_GENERO, **particiones)
+    if COL_AREA in rankings:
+        ind["conteo_ocde"] = rankings[COL_AREA].top_k(**particiones)
+
+    # Tarjetas principales
+    ind["total"] = int(ind["genero_global"].sum())
+    ind["total_hombres"] = ind["genero_global"].get(GENERO_HOMBRE, 0)
+    ind["total_mujeres"] = ind["genero_global"].get(GENERO_MUJER, 0)
+    ind["destinos"] = ind["conteo_destino"].index
+    ind["destinos_unicos"] = len(ind["destinos"])
+
+    # Participación y ranking de destinos
+    ind["participacion_por_pais"] = (ind["participacion_por_pais"] * 100).round(2)
+    ind["top5"] = destinos.top_k(5, **particiones)
+
+    return ind
+
+
+def sexo_ocde(rankings, años, regiones, generos, top_n):
+    """Tabla y pivot Sexo × OCDE para las Top N categorías de la selección ("Todos" = sin límite)."""
+    ocde = rankings[COL_AREA]
+    particiones = {COL_ANIO: años, COL_REGION: regiones, COL_GENERO: generos}
+
+    # Top N por conteo total (fusión de las particiones, no recuento de registros)
+    ocde_seleccionadas = ocde.top_k(None if top_n == "Todos" else top_n, **particiones).index.tolist()
+
+    # Pivot para la gráfica
+    pivot_ocde = ocde.tabla(COL_GENERO, **particiones).loc[sorted(ocde_seleccionadas)]
+
+    # Tabla Sexo vs OCDE
+    tabla_sexo_ocde = pivot_ocde.stack().rename("Total").reset_index()
+    tabla_sexo_ocde = tabla_sexo_ocde[tabla_sexo_ocde["Total"] > 0].sort_values([COL_AREA, COL_GENERO])
+
+    return tabla_sexo_ocde, pivot_ocde
+
+
+def construir_proyecciones(cubo):
+    """Parámetros de tendencia de todas las series año a año (se ajustan una vez por versión)."""
+    return Proyecciones(cubo)
+
+
+def proyeccion(proyecciones, regiones, generos, dimension, anio=ANIO_PROYECCION):
+    """Observado del último año y proyección de cada modelo para la selección de región y género."""
+    return proyecciones.tabla(dimension, anio, **{COL_REGION: regiones, COL_GENERO: generos})
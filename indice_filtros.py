@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from cubo import COL_ANIO, COL_AREA, COL_DEPARTAMENTO, COL_GENERO, COL_REGION
+
+# Dimensiones indexadas: las de la barra lateral y las previstas para filtros futuros
+DIMENSIONES_INDICE = [COL_ANIO, COL_REGION, COL_GENERO, COL_DEPARTAMENTO, COL_AREA]
+
+# Lógica del índice: por cada valor distinto de una dimensión se guarda un mapa de
+# bits empaquetado (1 bit por registro). Una selección se resuelve con OR entre
+# los valores de una dimensión y AND entre dimensiones, sin recorrer el DataFrame.
+
+
+class IndiceBitmap:
+    """Índice de mapas de bits por valor para las dimensiones de filtrado."""
+
+    def __init__(self, df, dimensiones=DIMENSIONES_INDICE):
+        self.n_filas = len(df)
+        self.categorias = {}
+        self.bitmaps = {}
+
+        for col in dimensiones:
+            if col not in df.columns:
+                continue
+            codigos, categorias = pd.factorize(df[col], sort=True)
+            self.categorias[col] = pd.Index(categorias)
+
+            # Un mapa de bits por código: se ordenan las filas por código una sola vez
+            orden = np.argsort(codigos, kind='stable')
+            limites = np.searchsorted(codigos[orden], np.arange(len(categorias) + 1))
+            bitmaps = []
+            for i in range(len(categorias)):
+                bits = np.zeros(self.n_filas, dtype=bool)
+                bits[orden[limites[i]:limites[i + 1]]] = True
+                bitmaps.append(np.packbits(bits))
+            self.bitmaps[col] = bitmaps
+
+    def _bitmap_dimension(self, col, valores):
+        """OR de los mapas de bits de los valores seleccionados en una dimensión."""
+        resultado = np.zeros((self.n_filas + 7) // 8, dtype=np.uint8)
+        for posicion in self.categorias[col].get_indexer(list(valores)):
+            if posicion >= 0:
+                resultado |= self.bitmaps[col][posicion]
+        return resultado
+
+    def seleccionar(self, **selecciones):
+        """Ids de fila (ordenados) que cumplen la selección ({columna: valores}); None no filtra."""
+        resultado = None
+        for col, valores in selecciones.items():
+            if valores is None:
+                continue
+            bits = self._bitmap_dimension(col, valores)
+            resultado = bits if resultado is None else resultado & bits
+
+        if resultado is None:
+            return np.arange(self.n_filas)
+        return np.flatnonzero(np.unpackbits(resultado, count=self.n_filas))
@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from functools import wraps
+
+import pandas as pd
+
+from carga_datos import CACHE_DIR
+
+# Instrumentación de las re-ejecuciones del dashboard: tiempo y memoria por etapa
+# y aciertos/fallos de las cachés. Se activa con EQUIDAD_INSTRUMENTACION=1; si está
+# desactivada, las etapas son contextos vacíos y las cachés no se envuelven.
+INSTRUMENTACION_ACTIVA = os.environ.get('EQUIDAD_INSTRUMENTACION', '') not in ('', '0')
+
+# Registro estructurado (una línea JSON por re-ejecución) para agregar entre sesiones
+RUTA_LOG = os.environ.get('EQUIDAD_LOG', os.path.join(CACHE_DIR, 'instrumentacion.jsonl'))
+
+# Registro de la re-ejecución en curso: cada sesión de Streamlit corre en su propio hilo
+_local = threading.local()
+_bloqueo_log = threading.Lock()
+
+
+def memoria_mb():
+    """Memoria residente (RSS) del proceso en MB, o None si el sistema no la expone."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+class RegistroRerun:
+    """Mediciones de una re-ejecución: etapas en orden y llamadas/fallos por caché."""
+
+    def __init__(self, sesion=None):
+        self.sesion = sesion
+        self.fecha = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        self.inicio = time.perf_counter()
+        self.etapas = []
+        self.llamadas = Counter()
+        self.fallos = Counter()
+
+    @contextmanager
+    def etapa(self, nombre):
+        memoria_inicial = memoria_mb()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            memoria_final = memoria_mb()
+            self.etapas.append({
+                'etapa': nombre,
+                'segundos': round(segundos, 6),
+                'memoria_mb': None if memoria_final is None else round(memoria_final, 1),
+                'delta_memoria_mb': None if memoria_final is None else round(memoria_final - memoria_inicial, 1),
+            })
+
+    def caches(self):
+        return {
+            nombre: {'llamadas': n, 'aciertos': n - self.fallos[nombre], 'fallos': self.fallos[nombre]}
+            for nombre, n in self.llamadas.items()
+        }
+
+    def resumen(self):
+        memoria = memoria_mb()
+        return {
+            'fecha': self.fecha,
+            'sesion': self.sesion,
+            'segundos': round(time.perf_counter() - self.inicio, 6),
+            'memoria_mb': None if memoria is None else round(memoria, 1),
+            'etapas': self.etapas,
+            'caches': self.caches(),
+        }
+
+
+def iniciar_rerun(sesion=None):
+    """Abre el registro de la re-ejecución actual; None si la instrumentación está desactivada."""
+    if not INSTRUMENTACION_ACTIVA:
+        return None
+    _local.registro = RegistroRerun(sesion)
+    return _local.registro
+
+
+def etapa(nombre):
+    """Contexto que mide una etapa de la re-ejecución actual (vacío si no hay registro)."""
+    registro = getattr(_local, 'registro', None)
+    if registro is None:
+        return nullcontext()
+    return registro.etapa(nombre)
+
+
+def finalizar_rerun():
+    """Cierra el registro actual, lo agrega al log JSON y devuelve su resumen."""
+    registro = getattr(_local, 'registro', None)
+    if registro is None:
+        return None
+    _local.registro = None
+    resumen = registro.resumen()
+    try:
+        os.makedirs(os.path.dirname(RUTA_LOG) or '.', exist_ok=True)
+        with _bloqueo_log, open(RUTA_LOG, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(resumen, ensure_ascii=False) + '\n')
+    except OSError as e:
+        print(f"No se pudo escribir el log de instrumentación: {e}")
+    return resumen
+
+
+def instrumentar_cache(cache, nombre=None):
+    """Aplica un decorador de caché de Streamlit contando llamadas y fallos (ejecuciones reales)."""
+    def decorador(funcion):
+        if not INSTRUMENTACION_ACTIVA:
+            return cache(funcion)
+        clave = nombre or funcion.__name__
+
+        # Solo se ejecuta cuando la caché no tiene el resultado
+        @wraps(funcion)
+        def cuerpo(*args, **kwargs):
+            registro = getattr(_local, 'registro', None)
+            if registro is not None:
+                registro.fallos[clave] += 1
+            return funcion(*args, **kwargs)
+
+        cacheada = cache(cuerpo)
+
+        @wraps(funcion)
+        def llamada(*args, **kwargs):
+            registro = getattr(_local, 'registro', None)
+            if registro is not None:
+                registro.llamadas[clave] += 1
+            return cacheada(*args, **kwargs)
+
+        llamada.clear = cacheada.clear
+        return llamada
+    return decorador
+
+
+def leer_log(ruta=RUTA_LOG):
+    """Re-ejecuciones registradas en el log JSON."""
+    with open(ruta, encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def agregar_log(registros):
+    """Percentiles de tiempo por etapa y tasa de aciertos por caché sobre varias re-ejecuciones."""
+    etapas = pd.DataFrame([e for r in registros for e in r['etapas']], columns=['etapa', 'segundos'])
+    tiempos = etapas.groupby('etapa')['segundos'].describe(percentiles=[0.5, 0.95])[['count', 'mean', '50%', '95%', 'max']]
+
+    caches = pd.DataFrame([
+        {'cache': nombre, **conteos} for r in registros for nombre, conteos in r['caches'].items()
+    ])
+    if caches.empty:
+        return tiempos, caches
+    caches = caches.groupby('cache')[['llamadas', 'aciertos', 'fallos']].sum()
+    caches['tasa_aciertos'] = (caches['aciertos'] / caches['llamadas']).round(3)
+    return tiempos, caches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agrega el log de instrumentación del dashboard.")
+    parser.add_argument('--log', default=RUTA_LOG, help="Archivo JSON por líneas con las re-ejecuciones.")
+    args = parser.parse_args()
+
+    try:
+        registros = leer_log(args.log)
+    except FileNotFoundError:
+        print(f"No existe el log '{args.log}'. Ejecute el dashboard con EQUIDAD_INSTRUMENTACION=1.")
+    else:
+        tiempos, caches = agregar_log(registros)
+        print(f"--- {len(registros)} re-ejecuciones, {len({r['sesion'] for r in registros})} sesiones ---")
+        print("\nTiempo por etapa (s):")
+        print(tiempos.round(4).to_string())
+        if not caches.empty:
+            print("\nCachés:")
+            print(caches.to_string())
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import unicodedata
+
+# Normalización de valores categóricos por tabla: cada valor crudo se reduce a una
+# clave de comparación (sin tildes, sin mayúsculas, '_' como espacio) y la clave se
+# busca en la tabla de la columna para obtener la etiqueta canónica. Los valores que
+# no están en la tabla solo se limpian de espacios. Como la tabla es fija, todas las
+# entradas (libro, almacén, deltas, bloques) obtienen las mismas etiquetas.
+
+GENERO_MUJER = 'Femenino'
+GENERO_HOMBRE = 'Masculino'
+
+GENEROS = [GENERO_MUJER, GENERO_HOMBRE, 'Intersexual']
+VARIANTES_GENERO = {
+    'f': GENERO_MUJER, 'mujer': GENERO_MUJER, 'femenina': GENERO_MUJER,
+    'm': GENERO_HOMBRE, 'hombre': GENERO_HOMBRE, 'masculina': GENERO_HOMBRE,
+    'intersex': 'Intersexual',
+}
+
+REGIONES = ['Caribe', 'Centro Oriente', 'Centro Sur', 'Eje Cafetero', 'Internacional', 'Llanos', 'Pacífico']
+
+DEPARTAMENTOS = [
+    'Amazonas', 'Antioquia', 'Arauca', 'Atlántico', 'Bogotá', 'Bolívar', 'Boyacá', 'Caldas', 'Caquetá',
+    'Casanare', 'Cauca', 'Cesar', 'Chocó', 'Córdoba', 'Cundinamarca', 'Guainía', 'Guaviare', 'Huila',
+    'La Guajira', 'Magdalena', 'Meta', 'Nariño', 'Norte de Santander', 'Putumayo', 'Quindío', 'Risaralda',
+    'San Andrés', 'Santander', 'Sucre', 'Tolima', 'Valle del Cauca', 'Vaupés', 'Vichada',
+]
+VARIANTES_DEPARTAMENTO = {
+    'bogota d.c.': 'Bogotá', 'bogota dc': 'Bogotá', 'bogota, d.c.': 'Bogotá', 'bogota d.c': 'Bogotá',
+    'santafe de bogota': 'Bogotá', 'distrito capital': 'Bogotá',
+    'guajira': 'La Guajira', 'valle': 'Valle del Cauca', 'norte santander': 'Norte de Santander',
+    'medellin': 'Antioquia',  # ciudad registrada en lugar del departamento
+    'san andres y providencia': 'San Andrés',
+    'san andres, providencia y santa catalina': 'San Andrés',
+    'archipielago de san andres, providencia y santa catalina': 'San Andrés',
+}
+
+AREAS_OCDE = [
+    'Ciencias Agrícolas', 'Ciencias Médicas y de la Salud', 'Ciencias Naturales', 'Ciencias Sociales',
+    'Humanidades', 'Ingeniería y Tecnología', 'No Disponible',
+]
+VARIANTES_AREA = {'no disponible': 'No Disponible', 'n/d': 'No Disponible', 'nd': 'No Disponible'}
+
+PAISES = [
+    'Alemania', 'Arabia Saudita', 'Argentina', 'Australia', 'Austria', 'Bélgica', 'Bolivia',
+    'Bosnia y Herzegovina', 'Brasil', 'Bulgaria', 'Canadá', 'Chile', 'China', 'Colombia', 'Corea del Sur',
+    'Costa Rica', 'Cuba', 'Dinamarca', 'Ecuador', 'Egipto', 'Emiratos Árabes Unidos', 'Eslovenia',
+    'España', 'Estados Unidos', 'Estonia', 'Filipinas', 'Finlandia', 'Francia', 'Guatemala', 'Honduras',
+    'Hungría', 'India', 'Irlanda', 'Islandia', 'Israel', 'Italia', 'Japón', 'Líbano', 'Luxemburgo',
+    'Malasia', 'México', 'Moldavia', 'Nicaragua', 'No Disponible', 'Noruega', 'Nueva Zelanda',
+    'Países Bajos', 'Panamá', 'Perú', 'Polonia', 'Portugal', 'Puerto Rico', 'Reino Unido',
+    'República Checa', 'República Dominicana', 'Rusia', 'Singapur', 'Sudáfrica', 'Suecia', 'Suiza',
+    'Ucrania', 'Uruguay', 'Venezuela',
+]
+VARIANTES_PAIS = {
+    'colombie': 'Colombia', 'estados unidos de america': 'Estados Unidos', 'eeuu': 'Estados Unidos',
+    'ee.uu.': 'Estados Unidos', 'ee. uu.': 'Estados Unidos', 'usa': 'Estados Unidos',
+    'united states': 'Estados Unidos', 'holanda': 'Países Bajos', 'inglaterra': 'Reino Unido',
+    'uk': 'Reino Unido', 'corea': 'Corea del Sur', 'republica de corea': 'Corea del Sur',
+    'chequia': 'República Checa', 'brazil': 'Brasil', 'spain': 'España', 'germany': 'Alemania',
+    'france': 'Francia', 'canada': 'Canadá', 'mejico': 'México',
+}
+
+MODALIDADES = ['Doctorado', 'Maestría', 'Posdoctorado']
+VARIANTES_MODALIDAD = {'postdoctorado': 'Posdoctorado', 'phd': 'Doctorado'}
+
+AMBITOS = ['Internacional', 'Nacional']
+
+
+def clave(valor):
+    """Clave de comparación: sin tildes ni mayúsculas, '_' como espacio y espacios simples."""
+    sin_tildes = ''.join(c for c in unicodedata.normalize('NFKD', str(valor)) if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.replace('_', ' ').split()).casefold()
+
+
+def _tabla(etiquetas, variantes=None):
+    """Tabla clave -> etiqueta canónica a partir de las etiquetas y sus variantes conocidas."""
+    tabla = {clave(etiqueta): etiqueta for etiqueta in etiquetas}
+    tabla.update({clave(variante): etiqueta for variante, etiqueta in (variantes or {}).items()})
+    return tabla
+
+
+# Tabla de búsqueda por columna del libro
+TABLAS = {
+    'Sexo': _tabla(GENEROS, VARIANTES_GENERO),
+    'Región de nacimiento': _tabla(REGIONES),
+    'Depto_nacimi': _tabla(DEPARTAMENTOS, VARIANTES_DEPARTAMENTO),
+    'OCDE': _tabla(AREAS_OCDE, VARIANTES_AREA),
+    'Pais de Estudios': _tabla(PAISES, VARIANTES_PAIS),
+    'Pais de nacimiento': _tabla(PAISES, VARIANTES_PAIS),
+    'Modalidad': _tabla(MODALIDADES, VARIANTES_MODALIDAD),
+    'Ambito': _tabla(AMBITOS),
+}
+
+# Huella de las tablas: forma parte de la versión de los datos, así que las
+# cachés y el almacén se regeneran cuando cambia la normalización
+VERSION_NORMALIZACION = hashlib.sha256(json.dumps(TABLAS, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def canonizar(valor, columna):
+    """Etiqueta canónica de un valor crudo de `columna` (el valor sin espacios sobrantes si no está en la tabla)."""
+    limpio = ' '.join(str(valor).split())
+    return TABLAS.get(columna, {}).get(clave(limpio), limpio)
+
+
+if __name__ == "__main__":
+    # Reporte de la normalización sobre el libro: variantes unificadas y valores fuera de tabla
+    from carga_datos import FILE_PATH, SHEET_NAME, cargar_dataframe
+
+    df = cargar_dataframe(FILE_PATH, SHEET_NAME)
+    for columna, tabla in TABLAS.items():
+        if columna not in df.columns:
+            continue
+        valores = df[columna].dropna().unique()
+        cambios = {valor: canonizar(valor, columna) for valor in valores if canonizar(valor, columna) != valor}
+        fuera = sorted({canonizar(valor, columna) for valor in valores if clave(valor) not in tabla})
+        print(f"\n--- {columna}: {len(valores)} valores crudos -> {len({canonizar(v, columna) for v in valores})} canónicos ---")
+        for valor, canonico in sorted(cambios.items()):
+            print(f"  {valor!r} -> {canonico!r}")
+        if fuera:
+            print(f"  Fuera de la tabla (se conservan): {fuera}")
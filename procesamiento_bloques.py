@@ -0,0 +1,108 @@
+import argparse
+from itertools import islice
+from pathlib import Path
+
+import pandas as pd
+
+from carga_datos import SHEET_NAME, compactar_dataframe, tipar_dataframe
+from cubo import COL_ANIO, COL_TOTAL, DIMENSIONES, construir_cubo
+
+# Procesamiento por bloques para extractos que no caben en memoria: cada bloque de
+# registros se tipa, se limpia y se agrega en un cubo parcial que luego se fusiona.
+# La memoria pico queda acotada por el tamaño del bloque y el número de celdas del
+# cubo (combinaciones distintas), no por el número de registros.
+FILAS_POR_BLOQUE = 100_000
+
+# Celdas parciales acumuladas antes de consolidarlas en un único cubo
+MAX_CELDAS_PENDIENTES = 1_000_000
+
+
+def _proyectar(bloque, columnas):
+    """Conserva solo las columnas pedidas (comparando nombres sin espacios al inicio/final)."""
+    if columnas is None:
+        return bloque
+    return bloque[[col for col in bloque.columns if str(col).strip() in columnas]]
+
+
+def _bloques_excel(ruta, hoja, filas_por_bloque):
+    """Lee una hoja de Excel en modo de solo lectura, fila a fila, sin cargar el libro completo."""
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro[hoja].iter_rows(values_only=True)
+        columnas = [str(col) for col in next(filas)]
+        while lote := list(islice(filas, filas_por_bloque)):
+            yield pd.DataFrame(lote, columns=columnas)
+    finally:
+        libro.close()
+
+
+def leer_bloques(ruta, filas_por_bloque=FILAS_POR_BLOQUE, columnas=None, hoja=SHEET_NAME):
+    """Recorre un archivo de registros (Parquet, CSV o Excel) en bloques de `filas_por_bloque` filas."""
+    sufijos = ''.join(Path(ruta).suffixes[-2:]).lower()
+    if sufijos.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        if columnas is not None:
+            columnas = [col for col in archivo.schema_arrow.names if col.strip() in columnas]
+        for lote in archivo.iter_batches(batch_size=filas_por_bloque, columns=columnas):
+            yield lote.to_pandas()
+    elif sufijos.endswith(('.csv', '.csv.gz')):
+        for bloque in pd.read_csv(ruta, chunksize=filas_por_bloque, dtype=str):
+            yield _proyectar(bloque, columnas)
+    elif sufijos.endswith(('.xlsx', '.xlsm')):
+        for bloque in _bloques_excel(ruta, hoja, filas_por_bloque):
+            yield _proyectar(bloque, columnas)
+    else:
+        raise ValueError(f"Formato no soportado para lectura por bloques: {ruta}")
+
+
+def fusionar_cubos(cubos, dimensiones=DIMENSIONES):
+    """Suma celda a celda varios cubos de conteos (parciales o de distintas fuentes)."""
+    unidos = pd.concat(cubos, ignore_index=True)
+    dimensiones = [col for col in dimensiones if col in unidos.columns]
+    return unidos.groupby(dimensiones, observed=True, dropna=False)[COL_TOTAL].sum().reset_index()
+
+
+def cubo_por_bloques(bloques, limpiar=None, dimensiones=DIMENSIONES, max_celdas=MAX_CELDAS_PENDIENTES):
+    """Cubo de conteos de un flujo de bloques: cada bloque se limpia, se agrega y se descarta."""
+    parciales, pendientes = [], 0
+    for bloque in bloques:
+        bloque = compactar_dataframe(tipar_dataframe(bloque))
+        if limpiar is not None:
+            bloque = limpiar(bloque)
+        parcial = construir_cubo(bloque, dimensiones)
+        parciales.append(parcial)
+        pendientes += len(parcial)
+
+        # Consolidar de vez en cuando para que los parciales no crezcan con los registros
+        if pendientes > max_celdas:
+            parciales = [fusionar_cubos(parciales, dimensiones)]
+            pendientes = len(parciales[0])
+
+    if not parciales:
+        return pd.DataFrame(columns=[*dimensiones, COL_TOTAL])
+
+    cubo = fusionar_cubos(parciales, dimensiones)
+    for col in cubo.columns.difference([COL_ANIO, COL_TOTAL], sort=False):
+        cubo[col] = cubo[col].astype('category')
+    return cubo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye el cubo de conteos de un extracto grande leyéndolo por bloques.")
+    parser.add_argument('ruta', help="Archivo de registros (.parquet, .csv, .csv.gz o .xlsx).")
+    parser.add_argument('salida', help="Archivo Parquet donde se guarda el cubo.")
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE)
+    parser.add_argument('--hoja', default=SHEET_NAME, help="Hoja del libro cuando la entrada es Excel.")
+    args = parser.parse_args()
+
+    try:
+        cubo = cubo_por_bloques(leer_bloques(args.ruta, args.filas_por_bloque, columnas=DIMENSIONES, hoja=args.hoja))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+    else:
+        cubo.to_parquet(args.salida, index=False)
+        print(f"Cubo de {len(cubo)} celdas ({int(cubo[COL_TOTAL].sum())} registros) guardado en '{args.salida}'.")
@@ -0,0 +1,150 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from agregaciones import ConteosParticionados
+from cubo import COL_ANIO, COL_AREA, COL_DEPARTAMENTO, COL_DESTINO, COL_GENERO, COL_REGION
+
+# Proyección de conteos por año con dos modelos de tendencia: recta por mínimos
+# cuadrados ('lineal') y suavizamiento exponencial doble de Holt ('holt'). Se ajustan
+# a la vez todas las series año a año de cada celda región × género × valor, en una
+# sola pasada vectorizada. Como ambos modelos son lineales en los conteos (con
+# parámetros de suavizamiento fijos), la proyección de cualquier selección de la barra
+# lateral es la suma de las proyecciones de sus celdas: no hay que volver a ajustar.
+ANIO_PROYECCION = 2026
+
+MODELOS = {'lineal': "Tendencia lineal (MCO)", 'holt': "Suavizamiento de Holt"}
+
+# Suavizamiento del nivel y de la tendencia del modelo de Holt
+ALFA = 0.5
+BETA = 0.3
+
+# Dimensiones que se proyectan y particiones por las que se puede filtrar
+DIMENSIONES_PROYECCION = [COL_GENERO, COL_DEPARTAMENTO, COL_AREA, COL_DESTINO]
+PARTICIONES_PROYECCION = [COL_REGION, COL_GENERO]
+
+
+def ajustar_lineal(series, anios):
+    """Recta por mínimos cuadrados de cada serie (último eje = años): (valor en el año medio, pendiente)."""
+    centrados = anios - anios.mean()
+    suma_cuadrados = (centrados ** 2).sum()
+    pendiente = series @ centrados / suma_cuadrados if suma_cuadrados > 0 else np.zeros(series.shape[:-1])
+    return series.mean(axis=-1), pendiente
+
+
+def ajustar_holt(series, alfa=ALFA, beta=BETA):
+    """Nivel y tendencia finales del suavizamiento de Holt de cada serie (último eje = años)."""
+    nivel = series[..., 0]
+    tendencia = series[..., 1] - series[..., 0] if series.shape[-1] > 1 else np.zeros(series.shape[:-1])
+    for t in range(1, series.shape[-1]):
+        anterior = nivel
+        nivel = alfa * series[..., t] + (1 - alfa) * (nivel + tendencia)
+        tendencia = beta * (nivel - anterior) + (1 - beta) * tendencia
+    return nivel, tendencia
+
+
+class Proyecciones:
+    """Parámetros ajustados de todas las series año a año de las dimensiones proyectadas.
+
+    Para cada dimensión se guardan, por celda región × género × valor, los parámetros
+    de cada modelo; una consulta suma los de las celdas seleccionadas y evalúa el año.
+    """
+
+    def __init__(self, cubo, dimensiones=DIMENSIONES_PROYECCION, particiones=PARTICIONES_PROYECCION):
+        self.etiquetas, self.particiones, tensores = {}, {}, {}
+        for dimension in [dim for dim in dimensiones if dim in cubo.columns]:
+            conteos = ConteosParticionados(
+                cubo, dimension, [*[dim for dim in particiones if dim != dimension], COL_ANIO]
+            )
+            # Ejes: particiones..., valor, año (sin la posición de años nulos)
+            tensores[dimension] = np.moveaxis(conteos.conteos, -2, -1)[..., :-1]
+            self.etiquetas[dimension] = conteos.etiquetas
+            self.particiones[dimension] = conteos.particiones[:-1]
+        if not tensores:
+            raise ValueError("El cubo no tiene ninguna de las dimensiones a proyectar.")
+
+        self.anios = np.asarray(next(iter(self.etiquetas.values()))[COL_ANIO], dtype=np.float64)
+        self.ultimo_anio = int(self.anios.max())
+        self.observados = {dim: tensor.astype(np.float64) for dim, tensor in tensores.items()}
+
+        # Todas las series de todas las dimensiones se ajustan en un solo lote
+        lote = np.concatenate([serie.reshape(-1, len(self.anios)) for serie in self.observados.values()])
+        ajustes = {'lineal': ajustar_lineal(lote, self.anios), 'holt': ajustar_holt(lote)}
+
+        self.parametros, inicio = {}, 0
+        for dim, serie in self.observados.items():
+            fin = inicio + serie[..., 0].size
+            self.parametros[dim] = {
+                modelo: tuple(param[inicio:fin].reshape(serie.shape[:-1]) for param in params)
+                for modelo, params in ajustes.items()
+            }
+            inicio = fin
+
+    def _seleccionar(self, dimension, tensor, selecciones):
+        """Suma el tensor sobre las celdas de las particiones seleccionadas ({columna: valores}; None no filtra)."""
+        etiquetas = self.etiquetas[dimension]
+        for eje, dim in enumerate(self.particiones[dimension]):
+            valores = selecciones.get(dim)
+            posiciones = slice(None) if valores is None else np.flatnonzero(etiquetas[dim].isin(valores))
+            tensor = tensor[(slice(None),) * eje + (posiciones,)]
+        return tensor.sum(axis=tuple(range(len(self.particiones[dimension]))))
+
+    def _serie(self, dimension, vector, nombre, selecciones):
+        """Serie por valor de la dimensión (sin nulos), filtrada si la dimensión también es un filtro.
+
+        Se omiten los valores sin registros en ningún año de la selección: su proyección es cero.
+        """
+        observados = self._seleccionar(dimension, self.observados[dimension], selecciones).sum(axis=-1)
+        serie = pd.Series(vector[:-1], index=self.etiquetas[dimension][dimension], name=nombre)
+        serie = serie[observados[:-1] > 0]
+        if selecciones.get(dimension) is not None:
+            serie = serie[serie.index.isin(selecciones[dimension])]
+        return serie
+
+    def proyectar(self, dimension, modelo='lineal', anio=ANIO_PROYECCION, **selecciones):
+        """Conteo proyectado para `anio` de cada valor de `dimension` en la selección."""
+        a, b = (self._seleccionar(dimension, param, selecciones) for param in self.parametros[dimension][modelo])
+        if modelo == 'lineal':
+            valores = a + b * (anio - self.anios.mean())
+        else:
+            valores = a + b * (anio - self.ultimo_anio)
+        return self._serie(dimension, valores, f"Proyección {anio}", selecciones)
+
+    def historico(self, dimension, **selecciones):
+        """Conteos observados año × valor de la selección."""
+        observados = self._seleccionar(dimension, self.observados[dimension], selecciones)
+        columnas = self._serie(dimension, np.arange(observados.shape[0]), None, selecciones)
+        return pd.DataFrame(
+            observados[columnas.to_numpy()].T.astype(np.int64),
+            index=pd.Index(self.anios.astype(int), name=COL_ANIO), columns=columnas.index,
+        )
+
+    def tabla(self, dimension, anio=ANIO_PROYECCION, **selecciones):
+        """Último año observado y proyección de cada modelo (redondeada, sin negativos) por valor."""
+        historico = self.historico(dimension, **selecciones)
+        tabla = pd.DataFrame({f"Observado {self.ultimo_anio}": historico.loc[self.ultimo_anio]})
+        for modelo, nombre in MODELOS.items():
+            proyeccion = self.proyectar(dimension, modelo, anio, **selecciones)
+            tabla[f"{nombre} {anio}"] = proyeccion.clip(lower=0).round().astype(np.int64)
+        return tabla.sort_values(tabla.columns[1], ascending=False)
+
+
+if __name__ == "__main__":
+    from almacen import cargar_cubo_almacen, sincronizar_almacen
+    from carga_datos import FILE_PATH
+
+    parser = argparse.ArgumentParser(description="Proyección de conteos por año de género, departamento, área OCDE y destino.")
+    parser.add_argument('--dimension', default=COL_GENERO, choices=DIMENSIONES_PROYECCION)
+    parser.add_argument('--anio', type=int, default=ANIO_PROYECCION)
+    parser.add_argument('--region', action='append', help="Región a incluir (repetible; por defecto todas).")
+    parser.add_argument('--genero', action='append', help="Género a incluir (repetible; por defecto todos).")
+    args = parser.parse_args()
+
+    try:
+        cubo = cargar_cubo_almacen(sincronizar_almacen(FILE_PATH), FILE_PATH)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+    else:
+        proyecciones = Proyecciones(cubo)
+        print(proyecciones.tabla(args.dimension, args.anio, **{COL_REGION: args.region, COL_GENERO: args.genero}).to_string())
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+# Tamaños de página ofrecidos en la tabla de detalle: solo la página visible se
+# serializa al navegador, así que el costo no crece con los registros filtrados.
+TAMANOS_PAGINA = [25, 50, 100, 200]
+
+
+def buscar_texto(df, filas, texto, columnas):
+    """Ids de `filas` con `texto` (sin distinguir mayúsculas) en alguna de `columnas`."""
+    texto = texto.casefold()
+    if not texto or not columnas:
+        return filas
+    coincide = np.zeros(len(filas), dtype=bool)
+    for col in columnas:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Se busca una vez por categoría y el resultado se propaga por código
+            en_categoria = serie.cat.categories.astype(str).str.casefold().str.contains(texto, regex=False)
+            codigos = serie.cat.codes.to_numpy()[filas]
+            coincide |= (codigos >= 0) & np.asarray(en_categoria)[codigos]
+        else:
+            valores = serie.take(filas).astype(str).str.casefold()
+            coincide |= valores.str.contains(texto, regex=False).to_numpy()
+    return filas[coincide]
+
+
+def ordenar_filas(df, filas, columna, ascendente=True):
+    """Ids de `filas` ordenados por `columna` (orden estable, nulos al final)."""
+    if columna is None:
+        return filas
+    valores = df[columna].take(filas).reset_index(drop=True)
+    orden = valores.sort_values(ascending=ascendente, kind='stable', na_position='last').index.to_numpy()
+    return filas[orden]
+
+
+def pagina(df, filas, columnas, numero, tamano):
+    """Registros de la página `numero` (desde 1), proyectados a `columnas`."""
+    inicio = (numero - 1) * tamano
+    return df.take(filas[inicio:inicio + tamano])[list(columnas)]
+
+
+def total_paginas(n_filas, tamano):
+    return max(1, -(-n_filas // tamano))